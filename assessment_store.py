@@ -0,0 +1,99 @@
+"""Generated assessments kept server-side under an exam id.
+
+Clients only ever see questions without their rubric and submit
+``{question_id, answer}`` pairs; grading reads the stored rubric from an
+in-process LRU cache that falls back to the assessment_exams table.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from config import settings
+from models import AssessmentExam
+
+# Fields that would give the answer away
+RUBRIC_FIELDS = ("correct_answer", "explanation", "sample_answer", "key_points")
+
+logger = logging.getLogger(__name__)
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def _strings(value) -> bool:
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(item, str) for item in value)
+
+
+def valid_question(question: Any) -> bool:
+    """Whether a generated question has everything grading reads"""
+    if not isinstance(question, dict) or not isinstance(question.get("question"), str):
+        return False
+    if question.get("type") == "mcq":
+        return _strings(question.get("options")) and isinstance(question.get("correct_answer"), str)
+    if question.get("type") == "short_answer":
+        return _strings(question.get("key_points")) and isinstance(question.get("sample_answer"), str)
+    return False
+
+
+def _remember(exam_id: str, questions: Dict[str, Dict[str, Any]], expires: float):
+    with _lock:
+        _cache[exam_id] = (questions, expires)
+        _cache.move_to_end(exam_id)
+        while len(_cache) > settings.assessment_cache_size:
+            _cache.popitem(last=False)
+
+
+def public_question(question: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in question.items() if key not in RUBRIC_FIELDS}
+
+
+def new_exam_id() -> str:
+    return uuid4().hex
+
+
+def question_id(index: int) -> str:
+    """Id of the question at a 1-based position in an exam"""
+    return f"q{index}"
+
+
+def create_exam(db, questions: List[Dict[str, Any]], exam_id: Optional[str] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """Store questions under an exam id (a new one by default), returning the id and the numbered questions
+
+    Malformed questions are dropped rather than stored, grading would fail on them.
+    """
+    exam_id = exam_id or new_exam_id()
+    malformed = [question for question in questions if not valid_question(question)]
+    if malformed:
+        logger.warning("Dropping %d malformed generated questions: %r", len(malformed), malformed)
+        questions = [question for question in questions if valid_question(question)]
+    questions = [{**question, "id": question_id(index)} for index, question in enumerate(questions, start=1)]
+    expires = datetime.now().timestamp() + settings.assessment_exam_ttl_hours * 3600
+
+    db.add(AssessmentExam(id=exam_id, questions=questions, expires=expires))
+    db.commit()
+
+    _remember(exam_id, {question["id"]: question for question in questions}, expires)
+    return exam_id, questions
+
+
+def get_exam(db, exam_id: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Stored questions of an exam keyed by question id, or None if unknown or expired"""
+    with _lock:
+        cached = _cache.get(exam_id)
+        if cached is not None:
+            _cache.move_to_end(exam_id)
+
+    if cached is None:
+        exam = db.query(AssessmentExam).filter(AssessmentExam.id == exam_id).first()
+        if exam is None:
+            return None
+        cached = ({question["id"]: question for question in exam.questions}, exam.expires)
+        _remember(exam_id, *cached)
+
+    questions, expires = cached
+    if expires < datetime.now().timestamp():
+        return None
+    return questions
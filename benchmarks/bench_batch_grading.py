@@ -0,0 +1,65 @@
+"""Per-answer versus batched short-answer grading against the local mock server.
+
+    python -m benchmarks.bench_batch_grading [--answers 30]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.mock_openai import MockOpenAIServer
+from benchmarks.sqlite import use_in_memory_database
+
+# gpt-3.5-turbo list prices, USD per million tokens
+PROMPT_PRICE = 0.5
+COMPLETION_PRICE = 1.5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=30)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer().start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    use_in_memory_database()
+    import evaluation_cache
+    from openai_utils import SkillAssessment
+
+    # The cache's concurrent writes from worker threads would share the one
+    # SQLite connection and fail; the runs use distinct answers anyway, so
+    # only the in-memory tier is kept
+    evaluation_cache._load = lambda key: None
+    evaluation_cache._store = lambda key, evaluation: None
+
+    question = {
+        "question": "Explain how React reconciles the virtual DOM.",
+        "type": "short_answer",
+        "sample_answer": "React diffs the new element tree against the previous one and applies minimal DOM updates.",
+        "key_points": ["Virtual DOM diffing", "Keys identify list items", "Batched DOM updates"],
+    }
+    for name, grade in (
+        ("per answer", SkillAssessment.evaluate_answers),
+        ("batched", SkillAssessment.evaluate_answers_batch),
+    ):
+        # Borderline answers, so the local grader escalates every one of them,
+        # distinct per run so the second is not served from the evaluation cache
+        pairs = [
+            (question, f"{name} answer {i}: React compares the virtual DOM and updates only what changed.")
+            for i in range(args.answers)
+        ]
+        server.reset()
+        start = time.perf_counter()
+        asyncio.run(grade(pairs))
+        elapsed = time.perf_counter() - start
+        cost = (server.prompt_tokens * PROMPT_PRICE + server.completion_tokens * COMPLETION_PRICE) / 1e6
+        print(
+            f"{name:>10}: {elapsed:6.2f}s, {args.answers / elapsed:6.1f} answers/s, {server.calls:3d} calls, "
+            f"{server.prompt_tokens:6d} prompt + {server.completion_tokens:6d} completion tokens, ${cost:.5f}"
+        )
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
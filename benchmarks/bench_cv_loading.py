@@ -0,0 +1,128 @@
+"""Memory each request allocates while users have large CVs.
+
+Seeds users in a temporary CV store and runs a set of requests through the
+app, reporting the peak memory traced while serving each: first as a
+baseline with tiny CVs, then with CVs of --cv-bytes. CVs are read through
+memory maps, which tracemalloc does not count, so only copies of CV bytes
+show up in the difference. Requests outside CV_REQUESTS must not grow by
+half a CV or more; the script exits non-zero if one does.
+
+    python -m benchmarks.bench_cv_loading [--users 20] [--cv-bytes 2000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.sqlite import use_in_memory_database
+
+# Requests that touch the CV, the download is also copied by the test client
+CV_REQUESTS = {"GET /api/auth/me", "GET /api/user/{id}/cv", "GET /api/jobseeker/matchJob/{id}"}
+
+REQUESTS = [
+    ("GET", "/api/user/allUsers", None),
+    ("GET", "/api/jobseeker/jobs", None),
+    ("POST", "/api/jobseeker/jobs", {"job_id": 1}),
+    ("POST", "/api/auth/login", {"email": "user1@example.com", "password": "wrong"}),
+    ("GET", "/api/auth/me", None),
+    ("GET", "/api/user/{id}/cv", None),
+    ("GET", "/api/jobseeker/matchJob/{id}", None),
+]
+
+
+# Size of the CVs in the baseline run
+BASELINE_CV_BYTES = 64
+
+
+def store_cvs(users: int, cv_bytes: int) -> dict:
+    """A distinct CV per user, returns their (hash, size) by user id"""
+    import blob_store
+
+    return {i: blob_store.put(b"%PDF-1.4\n" + os.urandom(cv_bytes)) for i in range(1, users + 1)}
+
+
+def use_cvs(db, cvs: dict):
+    import models
+
+    for user_id, (cv_hash, cv_size) in cvs.items():
+        db.query(models.User).filter(models.User.id == user_id).update({"cv_hash": cv_hash, "cv_size": cv_size})
+    db.commit()
+
+
+def seed(db, users: int):
+    import models
+    import utils
+
+    password = utils.hash("password")
+    db.add_all([models.Role(id=0, name="ADMIN"), models.Permission(id=1, name="VIEW_USER", category="GET")])
+    db.add(models.RolePermission(role_id=0, permission_id=1))
+    db.add_all([
+        models.User(id=i, name=f"User {i}", email=f"user{i}@example.com", password=password, role_id=0,
+                    cv_mime="application/pdf")
+        for i in range(1, users + 1)
+    ])
+    db.add(models.Session(id="session", user_id=1, expires=time.time() + 3600))
+    db.add(models.Job(id=1, title="job", description="d", company_name="c", location="l", salary=1,
+                      skills=["python"], experience=0))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--cv-bytes", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    from config import settings
+
+    store = tempfile.TemporaryDirectory(prefix="cv_store-")
+    settings.cv_store_path = store.name
+
+    use_in_memory_database()
+    import database
+    db = database.SessionLocal()
+    seed(db, args.users)
+
+    from fastapi.testclient import TestClient
+
+    import main as app_module
+
+    client = TestClient(app_module.app)
+    client.cookies.set("SESSION", "session")
+
+    def peaks() -> dict:
+        result = {}
+        for method, path, body in REQUESTS:
+            # Fresh identity map, so nothing is served from an earlier request
+            database.DatabaseSessionSingleton.get_instance().expunge_all()
+            tracemalloc.start()
+            response = client.request(method, path.format(id=1), json=body)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result[f"{method} {path}"] = (response.status_code, peak)
+        return result
+
+    use_cvs(db, store_cvs(args.users, BASELINE_CV_BYTES))
+    # The first pass warms up imports and caches, it would inflate the baseline
+    peaks()
+    baseline = peaks()
+    use_cvs(db, store_cvs(args.users, args.cv_bytes))
+    measured = peaks()
+
+    copies = []
+    for name, (status_code, peak) in measured.items():
+        growth = peak - baseline[name][1]
+        print(f"  {name:<36} {status_code}  {peak / 1e6:8.1f} MB peak  {growth / 1e6:+8.1f} MB over baseline")
+        if growth >= args.cv_bytes / 2 and name not in CV_REQUESTS:
+            copies.append(name)
+
+    store.cleanup()
+    if copies:
+        print(f"Requests copying CV bytes without needing them: {', '.join(copies)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
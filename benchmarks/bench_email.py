@@ -0,0 +1,142 @@
+"""Email outbox delivery against a local aiosmtpd server standing in for SMTP.
+
+Queues --emails messages and runs the worker's batches until the outbox is
+drained, then checks that every message arrived exactly once. Also checks
+that emails are claimed (marked sending) before they are sent, that an
+unreachable server leaves emails pending with a backoff, and that emails
+claimed by a worker that died are picked up once their lease runs out.
+Exits non-zero when a check fails.
+
+    pip install aiosmtpd
+    python -m benchmarks.bench_email [--emails 200] [--delay 0.0]
+"""
+import argparse
+import asyncio
+import socket
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.sqlite import use_in_memory_database
+
+
+class RecordingHandler:
+    """Accepts every message and records its subject, optionally slowly"""
+
+    def __init__(self, delay: float, on_message):
+        self.delay = delay
+        self.on_message = on_message
+        self.subjects = Counter()
+
+    async def handle_DATA(self, server, session, envelope):
+        subject = next(
+            line.split(":", 1)[1].strip()
+            for line in envelope.content.decode().splitlines()
+            if line.startswith("Subject:")
+        )
+        self.on_message(subject)
+        self.subjects[subject] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds the server takes per message")
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        sys.exit("aiosmtpd is required: pip install aiosmtpd")
+
+    from config import settings
+
+    port = free_port()
+    settings.smtp_host = "127.0.0.1"
+    settings.smtp_port = port
+    settings.smtp_use_ssl = False
+
+    use_in_memory_database()
+    import database
+    import email_worker
+    from models import EmailOutbox
+
+    def status_of(subject):
+        db = database.SessionLocal()
+        try:
+            return db.query(EmailOutbox.status).filter(EmailOutbox.subject == subject).scalar()
+        finally:
+            db.close()
+
+    # The claim must be written before the server sees the message
+    unclaimed = []
+    handler = RecordingHandler(
+        args.delay, lambda subject: unclaimed.append(subject) if status_of(subject) != "sending" else None
+    )
+
+    db = database.SessionLocal()
+    db.add_all([EmailOutbox(receiver="user@example.com", subject=f"email {i}", body="hello") for i in range(args.emails)])
+    db.commit()
+
+    failures = []
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    connection = email_worker.SMTPConnection()
+    try:
+        start = time.perf_counter()
+        while email_worker.deliver_batch(connection):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f"{args.emails} emails in {elapsed:.2f}s ({args.emails / elapsed:.0f}/s)")
+
+        statuses = Counter(status for status, in db.query(EmailOutbox.status))
+        duplicates = [subject for subject, count in handler.subjects.items() if count > 1]
+        print(f"outbox: {dict(statuses)}, received {sum(handler.subjects.values())}, duplicates {len(duplicates)}")
+        if statuses != Counter(sent=args.emails) or len(handler.subjects) != args.emails or duplicates:
+            failures.append("not every email was delivered exactly once")
+        if unclaimed:
+            failures.append(f"{len(unclaimed)} emails were sent before they were claimed")
+
+        # A worker that claimed a batch and died: nothing is due until the lease ends
+        db.add(EmailOutbox(receiver="user@example.com", subject="orphan", body="hello"))
+        db.commit()
+        email_worker.claim_batch()
+        if email_worker.deliver_batch(connection):
+            failures.append("a leased email was claimed again before its lease ended")
+        db.query(EmailOutbox).filter(EmailOutbox.subject == "orphan").update({"next_attempt_at": datetime.utcnow()})
+        db.commit()
+        email_worker.deliver_batch(connection)
+        print(f"orphaned email after its lease: {status_of('orphan')}")
+        if status_of("orphan") != "sent" or handler.subjects["orphan"] != 1:
+            failures.append("an orphaned email was not delivered after its lease")
+    finally:
+        connection.close()
+        controller.stop()
+
+    # Server gone: the email goes back to pending with a backoff
+    db.add(EmailOutbox(receiver="user@example.com", subject="unreachable", body="hello"))
+    db.commit()
+    email_worker.deliver_batch(connection)
+    email = db.query(EmailOutbox).filter(EmailOutbox.subject == "unreachable").one()
+    print(f"with the server down: {email.status}, {email.attempts} attempt, retry at {email.next_attempt_at:%H:%M:%S}")
+    if email.status != "pending" or email.attempts != 1 or email.next_attempt_at <= datetime.utcnow():
+        failures.append("a failed send was not scheduled for retry")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
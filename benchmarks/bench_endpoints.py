@@ -0,0 +1,103 @@
+"""Throughput of the assessment endpoints with no network, on a mock or replayed LLM.
+
+    python -m benchmarks.bench_endpoints [--mode mock] [--iterations 50] [--concurrency 8]
+
+--mode record runs against the configured OpenAI endpoint and saves every
+response to settings.llm_record_path; --mode replay then serves the same
+run from that file, deterministically and offline.
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.sqlite import use_in_memory_database
+
+
+async def iteration(client, index, timings):
+    async def timed(name, request):
+        start = time.perf_counter()
+        response = await request
+        timings[name].append(time.perf_counter() - start)
+        response.raise_for_status()
+        return response.json()
+
+    # A skill set of its own per iteration, so every assessment is generated rather than banked
+    assessment = await timed("generate-assessment", client.get(
+        "/api/jobseeker/generate-assessment",
+        params={"skills": [f"skill-{index}", "python"], "num_questions": 6, "question_type": "mixed"},
+    ))
+    answers = [
+        {
+            "question_id": question["id"],
+            "answer": question["options"][0] if question["type"] == "mcq"
+            # Borderline, so the local grader hands it to the LLM
+            else f"Answer {index}: it covers key point 1 but little else",
+        }
+        for question in assessment["questions"]
+    ]
+    await timed("evaluate-assessment", client.post(
+        "/api/jobseeker/evaluate-assessment", json={"exam_id": assessment["exam_id"], "answers": answers}
+    ))
+    await timed("react-ui-task", client.post(
+        "/api/jobseeker/react-ui-task", json={"ui_type": f"dashboard-{index}", "difficulty": "medium"}
+    ))
+
+
+async def run(app, iterations, concurrency):
+    timings = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def limited(index):
+            async with semaphore:
+                await iteration(client, index, timings)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(limited(index) for index in range(iterations)))
+        return time.perf_counter() - start, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["mock", "record", "replay"], default="mock")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    use_in_memory_database()
+    from config import settings
+    settings.llm_mode = args.mode
+    # Every request comes from one anonymous client, keep its quota out of the way of the run
+    settings.llm_quota_client_tokens_per_hour = settings.llm_quota_client_burst_tokens = 10 ** 12
+    import database
+    import llm_usage
+    from main import app
+
+    # The shared get_db session is not safe under concurrent requests, give each its own
+    def own_session():
+        db = database.SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[database.get_db] = own_session
+
+    elapsed, timings = asyncio.run(run(app, args.iterations, args.concurrency))
+
+    requests = sum(len(samples) for samples in timings.values())
+    print(f"{args.mode}: {requests} requests in {elapsed:.2f}s, {requests / elapsed:.1f} req/s")
+    for name, samples in timings.items():
+        samples.sort()
+        print(
+            f"{name:>20}: p50 {samples[len(samples) // 2] * 1000:7.1f}ms  "
+            f"p95 {samples[int(len(samples) * 0.95) - 1] * 1000:7.1f}ms"
+        )
+    print(f"LLM calls by route: { {route: totals['calls'] for route, totals in llm_usage.stats()['routes'].items()} }")
+
+
+if __name__ == "__main__":
+    main()
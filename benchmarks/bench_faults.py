@@ -0,0 +1,86 @@
+"""Answer grading while the mock server fails, rate limits and hangs.
+
+Shows the per-call deadline bounding latency, the retry budget bounding
+extra load and the circuit breaker handing over to the local grader.
+
+    python -m benchmarks.bench_faults [--answers 200] [--error-rate 0.4] [--hang-rate 0.1]
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+
+from benchmarks.mock_openai import MockOpenAIServer
+from benchmarks.sqlite import use_in_memory_database
+
+
+async def grade(pairs, concurrency):
+    from openai_utils import SkillAssessment
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(question, answer):
+        async with semaphore:
+            start = time.perf_counter()
+            evaluation = await SkillAssessment.evaluate_answer(question, answer)
+            latencies.append(time.perf_counter() - start)
+            return evaluation
+
+    evaluations = await asyncio.gather(*(one(question, answer) for question, answer in pairs))
+    return evaluations, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.4)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.1)
+    parser.add_argument("--hang-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(base_latency=0.05).start()
+    server.set_faults(
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, hang_rate=args.hang_rate, hang_seconds=30
+    )
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    use_in_memory_database()
+
+    # Scaled down so the run takes seconds; must be set before llm builds its breaker
+    from config import settings
+    settings.openai_evaluation_deadline_seconds = 2
+    settings.openai_retry_base_delay_seconds = 0.05
+    settings.openai_breaker_open_seconds = 1
+    import llm
+
+    question = {
+        "question": "Explain how React reconciles the virtual DOM.",
+        "type": "short_answer",
+        "sample_answer": "React diffs the new element tree against the previous one and applies minimal DOM updates.",
+        "key_points": ["Virtual DOM diffing", "Keys identify list items", "Batched DOM updates"],
+    }
+    # Distinct borderline answers, so none is graded locally up front or cached
+    pairs = [(question, f"Answer {i}: React compares the virtual DOM and updates only what changed.") for i in range(args.answers)]
+
+    start = time.perf_counter()
+    evaluations, latencies = asyncio.run(grade(pairs, args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    outcomes = Counter(
+        "error" if "error" in evaluation else "provisional" if evaluation.get("provisional") else "llm"
+        for evaluation in evaluations
+    )
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{args.answers} answers in {elapsed:.2f}s, latency p50 {p50:.2f}s p99 {p99:.2f}s max {latencies[-1]:.2f}s")
+    print(f"graded: {dict(outcomes)}")
+    print(f"upstream requests: {server.calls + server.faults} ({server.faults} faulted)")
+    print(f"resilience: {llm.resilience_stats()}")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Encoding time of a large allUsers payload, stdlib json versus orjson.
+
+The payload has the shape /api/user/allUsers returns. The stdlib run
+formats created_at with strftime first, as the routers used to, while
+orjson encodes the datetimes natively.
+
+    python -m benchmarks.bench_json [--users 10000] [--cv-bytes 4096] [--runs 3]
+"""
+import argparse
+import base64
+import os
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+
+def _users(count: int, cv_bytes: int):
+    cv = base64.b64encode(os.urandom(cv_bytes)).decode("utf-8")
+    permissions = ["VIEW_USER", "POST_JOB", "LIST_ALL_ROLES", "LIST_ALL_PERMISSIONS"]
+    created = datetime(2025, 1, 1)
+    users = []
+    for i in range(count):
+        # Every other user has uploaded a CV
+        has_cv = i % 2 == 0
+        users.append({
+            "id": i,
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "role": {"id": 1, "name": "JOBSEEKER", "permissions": permissions},
+            "username": f"user{i}",
+            "contact": "+8801700000000",
+            "company_name": None,
+            "job_title": "Frontend Developer",
+            "message": None,
+            "has_cv": has_cv,
+            "cv_data": cv if has_cv else None,
+            "cv_summary": "Frontend developer with five years of React and TypeScript experience." if has_cv else None,
+            "cv_key_info": {
+                "name": f"User {i}", "email": f"user{i}@example.com", "phone": None,
+                "skills": ["react", "typescript", "css"], "education": [], "experience": [],
+            } if has_cv else None,
+            "created_at": created + timedelta(minutes=i),
+        })
+    return users
+
+
+def _time(encode, runs: int):
+    best = None
+    size = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        size = len(encode())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--cv-bytes", type=int, default=4096)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    users = _users(args.users, args.cv_bytes)
+
+    def stdlib():
+        formatted = [{**user, "created_at": user["created_at"].strftime("%Y-%m-%d %H:%M:%S")} for user in users]
+        return JSONResponse(status_code=200, content={"users": formatted}).body
+
+    def orjson():
+        return ORJSONResponse(status_code=200, content={"users": users}).body
+
+    for name, encode in (("json", stdlib), ("orjson", orjson)):
+        seconds, size = _time(encode, args.runs)
+        print(f"{name:>7}: {seconds * 1000:8.1f} ms for {args.users} users, {size / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Tokens and latency per SkillAssessment operation, before and after prompt compaction.
+
+"before" replays the original prompts: indented templates, every skill
+interpolated as given and gpt-3.5-turbo with fixed max_tokens for every
+operation. "after" uses the prompts and per-operation settings of
+openai_utils. Both run against the local mock server, which charges latency
+for prompt as well as completion tokens.
+
+    python -m benchmarks.bench_prompts [--runs 5]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.mock_openai import MockOpenAIServer
+
+# A skill list as it comes out of CV parsing: repeats, casing variants, a long tail
+SKILLS = [
+    "Python", "React", "python", "JavaScript", "TypeScript", "React", "Node.js", "SQL", "PostgreSQL",
+    "Docker", "Kubernetes", "AWS", "react", "Git", "REST APIs", "GraphQL", "Redux", "HTML", "CSS",
+    "Tailwind CSS", "Jest", "CI/CD", "Linux", "FastAPI", "Django", "Flask", "Agile", "Scrum",
+    "Communication", "Teamwork", "Problem solving", "JavaScript", "Node.js",
+]
+
+QUESTION = {
+    "question": "Explain how React reconciles the virtual DOM.",
+    "type": "short_answer",
+    "sample_answer": "React diffs the new element tree against the previous one and applies minimal DOM updates.",
+    "key_points": ["Virtual DOM diffing", "Keys identify list items", "Batched DOM updates"],
+}
+ANSWER = "React compares the virtual DOM and updates only what changed."
+
+
+def _before_questions():
+    skills_text = ", ".join(SKILLS)
+    prompt = f"""
+    Generate a skill assessment with 5 questions for a job candidate with the following skills: {skills_text}.
+    
+    Include 2 multiple-choice questions and 3 short answer questions.
+    
+    For multiple-choice questions, provide 4 options with one correct answer.
+    
+    Format the response as a JSON array with the following structure:
+    [
+        {{
+            "question": "Question text",
+            "type": "mcq",
+            "options": ["Option A", "Option B", "Option C", "Option D"],
+            "correct_answer": "The correct option",
+            "explanation": "Explanation of the correct answer"
+        }},
+        {{
+            "question": "Short answer question text",
+            "type": "short_answer",
+            "sample_answer": "A sample correct answer",
+            "key_points": ["Key point 1", "Key point 2", "Key point 3"]
+        }}
+    ]
+    
+    Make sure the questions are challenging but appropriate for a technical interview.
+    """
+    return [
+        {"role": "system", "content": "You are a technical interviewer creating skill assessment questions."},
+        {"role": "user", "content": prompt},
+    ], "gpt-3.5-turbo", 2000
+
+
+def _before_react_ui_task():
+    prompt = """
+    Generate a detailed React UI development task for a dashboard with medium difficulty.
+    
+    The UI should include these features: responsive, dark-mode.
+    
+    
+    Format the response as a JSON object with the following structure:
+    {
+        "task_type": "The type of UI task",
+        "title": "A catchy title for the task",
+        "description": "A detailed description of what to build",
+        "requirements": ["Requirement 1", "Requirement 2", ...],
+        "bonus_features": ["Bonus feature 1", "Bonus feature 2", ...],
+        "difficulty": "medium"
+    }
+    
+    Make the task challenging but appropriate for the medium difficulty level.
+    Be creative and specific with the requirements.
+    """
+    return [
+        {"role": "system", "content": "You are a React developer creating UI development tasks."},
+        {"role": "user", "content": prompt},
+    ], "gpt-3.5-turbo", 1000
+
+
+def _before_evaluation():
+    prompt = f"""
+                Question: {QUESTION["question"]}
+                
+                Sample correct answer: {QUESTION["sample_answer"]}
+                
+                Key points that should be addressed:
+                {", ".join(QUESTION["key_points"])}
+                
+                User's answer: {ANSWER}
+                
+                Evaluate the user's answer. Consider:
+                1. Does it address the key points?
+                2. Is it technically accurate?
+                3. How complete is the answer?
+                
+                Return a JSON object with the following format:
+                {{
+                    "score": [A score from 0-10],
+                    "feedback": "Detailed feedback on the answer",
+                    "missing_points": ["Any key points that were missed"],
+                    "is_correct": [true if score >= 7, false otherwise]
+                }}
+                """
+    return [
+        {"role": "system", "content": "You are a technical interviewer evaluating candidate responses."},
+        {"role": "user", "content": prompt},
+    ], "gpt-3.5-turbo", 1000
+
+
+def _after():
+    from config import settings
+    from openai_utils import _evaluation_messages, _question_messages, _react_ui_task_messages
+
+    return {
+        "generate_questions": lambda: (
+            _question_messages(SKILLS, 5, "mixed"), settings.llm_question_model, settings.llm_question_max_tokens
+        ),
+        "generate_react_ui_task": lambda: (
+            _react_ui_task_messages("dashboard", "medium", ["responsive", "dark-mode"], None),
+            settings.llm_react_ui_task_model,
+            settings.llm_react_ui_task_max_tokens,
+        ),
+        "evaluate_answer": lambda: (
+            _evaluation_messages(QUESTION, ANSWER), settings.llm_evaluation_model, settings.llm_evaluation_max_tokens
+        ),
+    }
+
+
+async def _measure(server, build, runs: int):
+    import llm
+
+    messages, model, max_tokens = build()
+    server.reset()
+    start = time.perf_counter()
+    for _ in range(runs):
+        await llm.complete(messages, model=model, temperature=0.0, max_tokens=max_tokens)
+    elapsed = (time.perf_counter() - start) / runs
+    return model, max_tokens, server.prompt_tokens // runs, server.completion_tokens // runs, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(base_latency=0.1, per_token_latency=0.002, per_prompt_token_latency=0.0005).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ["LLM_MODE"] = "live"
+
+    before = {
+        "generate_questions": _before_questions,
+        "generate_react_ui_task": _before_react_ui_task,
+        "evaluate_answer": _before_evaluation,
+    }
+    after = _after()
+
+    async def run():
+        for operation in before:
+            for name, build in (("before", before[operation]), ("after", after[operation])):
+                model, max_tokens, prompt_tokens, completion_tokens, seconds = await _measure(server, build, args.runs)
+                print(
+                    f"{operation:>22} {name:>6}: {prompt_tokens:5d} prompt + {completion_tokens:5d} completion tokens, "
+                    f"max_tokens {max_tokens:5d}, {model}, {seconds * 1000:7.1f} ms"
+                )
+
+    asyncio.run(run())
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Per-call overhead of the ORM Query API versus the cached statements in queries.py.
+
+Runs against in-memory SQLite so the numbers are dominated by Python-side
+statement construction and compilation rather than the database.
+
+    python -m benchmarks.bench_queries [--iterations 5000]
+"""
+import argparse
+import timeit
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import queries
+from database import Base
+from models import Job, Permission, Role, RolePermission, Session, User
+
+
+def seed(db):
+    db.add_all([Role(id=0, name="ADMIN"), Permission(id=1, name="VIEW_USER", category="GET")])
+    db.add(RolePermission(id=1, role_id=0, permission_id=1))
+    db.add(User(id=1, name="user", email="user@example.com", password="x", role_id=0))
+    db.add(Session(id="session", user_id=1, expires=0))
+    db.add(Job(id=1, title="job", description="d", company_name="c", location="l", salary="0", skills=[], experience=0))
+    db.commit()
+
+
+def query_api(db):
+    db.query(Session).filter(Session.id == "session").first()
+    db.query(User).filter(User.id == 1).first()
+    role_permissions = db.query(RolePermission).filter(RolePermission.role_id == 0).all()
+    [db.query(Permission).filter(Permission.id == rp.permission_id).first().name for rp in role_permissions]
+    db.query(Job).filter(Job.id == 1).first()
+
+
+def cached_statements(db):
+    queries.get_session(db, "session")
+    queries.get_user(db, 1)
+    queries.get_role_permissions(db, 0)
+    queries.get_job(db, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    seed(db)
+
+    for name, fn in (("query api", query_api), ("cached statements", cached_statements)):
+        fn(db)  # warm the compiled cache
+        elapsed = timeit.timeit(lambda: fn(db), number=args.iterations)
+        print(f"{name:>18}: {elapsed / args.iterations * 1e6:8.1f} us per request")
+
+    print(f"statement cache: {queries.statement_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Query counts of the routes that declare a query budget, failing on any overrun.
+
+Seeds enough users, roles, permissions and jobs that an N+1 pattern shows
+up as extra queries, runs one request per budgeted route through the app and
+compares the X-DB-Query-Count header with the route's budget. Exits non-zero
+when a route goes over budget or a budgeted route has no request below.
+
+    python -m benchmarks.bench_query_budgets [--rows 20]
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+from benchmarks.sqlite import use_in_memory_database
+
+# One request per budgeted route
+REQUESTS = {
+    "/api/auth/login": ("POST", "/api/auth/login", {"email": "user1@example.com", "password": "password"}),
+    "/api/auth/me": ("GET", "/api/auth/me", None),
+    "/api/jobseeker/matchJob/{user_id}": ("GET", "/api/jobseeker/matchJob/1", None),
+    "/api/jobseeker/jobs": ("GET", "/api/jobseeker/jobs", None),
+    "/api/rbac/listAllRoles": ("GET", "/api/rbac/listAllRoles", None),
+    "/api/user/allUsers": ("GET", "/api/user/allUsers", None),
+}
+
+
+def minimal_pdf(text: str) -> bytes:
+    """A one-page PDF showing text, enough for the CV parser"""
+    content = b"BT /F1 12 Tf 20 200 Td (" + text.encode() + b") Tj ET"
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 300 300] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+def seed(db, rows: int):
+    import blob_store
+    import models
+    import utils
+
+    cv_hash, cv_size = blob_store.put(minimal_pdf("Python developer with React and SQL experience"))
+    permissions = ["VIEW_USER", "LIST_ALL_ROLES"] + [f"PERMISSION_{i}" for i in range(rows)]
+    db.add_all([models.Permission(id=i, name=name, category="GET") for i, name in enumerate(permissions, 1)])
+    db.add_all([models.Role(id=i, name=f"ROLE_{i}") for i in range(rows)])
+    db.add_all([
+        models.RolePermission(role_id=role_id, permission_id=permission_id)
+        for role_id in range(rows)
+        for permission_id in range(1, len(permissions) + 1)
+    ])
+    password = utils.hash("password")
+    db.add_all([
+        models.User(
+            id=i, name=f"User {i}", email=f"user{i}@example.com", password=password, role_id=i % rows,
+            cv_hash=cv_hash, cv_size=cv_size, cv_mime="application/pdf",
+        )
+        for i in range(1, rows + 1)
+    ])
+    db.add(models.Session(id="session", user_id=rows, expires=time.time() + 3600))
+    db.add_all([
+        models.Job(id=i, title=f"Job {i}", description="d", company_name="c", location="l", salary=1,
+                   skills=["python", "react"], experience=0)
+        for i in range(1, rows + 1)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20)
+    args = parser.parse_args()
+
+    from config import settings
+
+    store = tempfile.TemporaryDirectory(prefix="cv_store-")
+    settings.cv_store_path = store.name
+
+    use_in_memory_database()
+    import database
+    seed(database.SessionLocal(), args.rows)
+
+    from fastapi.testclient import TestClient
+
+    import main as app_module
+    from query_budget import route_budgets
+
+    client = TestClient(app_module.app)
+    client.cookies.set("SESSION", "session")
+
+    failures = []
+    for path, budget in sorted(route_budgets(app_module.app).items()):
+        if path not in REQUESTS:
+            print(f"  {path:<40} no request defined")
+            failures.append(path)
+            continue
+        method, url, body = REQUESTS[path]
+        # Fresh identity map, so nothing is served from an earlier request
+        database.DatabaseSessionSingleton.get_instance().expunge_all()
+        response = client.request(method, url, json=body)
+        count = int(response.headers["X-DB-Query-Count"])
+        verdict = "ok" if count <= budget else "OVER BUDGET"
+        print(f"  {path:<40} {response.status_code}  {count:3d} / {budget:<3d} queries  {verdict}")
+        if count > budget:
+            failures.append(path)
+
+    store.cleanup()
+    if failures:
+        print(f"Query budget check failed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Time to first question, buffered versus streamed generation, against the local mock server.
+
+    python -m benchmarks.bench_streaming [--questions 10]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.mock_openai import MockOpenAIServer
+
+SKILLS = ["python", "react", "postgresql"]
+
+
+async def buffered(num_questions):
+    from openai_utils import SkillAssessment
+
+    start = time.perf_counter()
+    questions = await SkillAssessment.generate_questions(SKILLS, num_questions, "short_answer")
+    elapsed = time.perf_counter() - start
+    # Nothing can be shown until the whole completion has been parsed
+    return elapsed, elapsed, len(questions)
+
+
+async def streamed(num_questions):
+    from openai_utils import SkillAssessment
+
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for _ in SkillAssessment.stream_questions(SKILLS, num_questions, "short_answer"):
+        count += 1
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=10)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(per_token_latency=0.01).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+
+    for name, generate in (("buffered", buffered), ("streamed", streamed)):
+        first, total, count = asyncio.run(generate(args.questions))
+        print(f"{name:>8}: first question {first:5.2f}s, all {count} questions {total:5.2f}s")
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""A local OpenAI-compatible chat completions server for benchmarks.
+
+Answers with the schema-valid payloads of llm_transport.mock_content and
+simulates latency proportional to the completion length, plus optionally the
+prompt length. Streaming requests
+get the same content as server-sent chunks, spaced out at the same rate.
+
+Faults can be injected with set_faults: a share of requests then fails with
+a 500, is rate limited with a 429, or hangs for ``hang_seconds``.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_transport import STREAM_CHUNK_CHARS, estimate_tokens, mock_content
+
+
+class MockOpenAIServer:
+    def __init__(self, port: int = 0, base_latency: float = 0.2, per_token_latency: float = 0.002,
+                 per_prompt_token_latency: float = 0.0):
+        self.base_latency = base_latency
+        self.per_token_latency = per_token_latency
+        self.per_prompt_token_latency = per_prompt_token_latency
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.faults = 0
+        self.set_faults()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        # Clients hang up on hung requests, that is expected and not worth a traceback
+        self._server.handle_error = lambda request, client_address: None
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def set_faults(self, error_rate: float = 0.0, rate_limit_rate: float = 0.0, hang_rate: float = 0.0,
+                   hang_seconds: float = 10.0, seed: int = 0):
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self._random = random.Random(seed)
+
+    def _pick_fault(self):
+        roll = self._random.random()
+        for fault, rate in (
+            ("error", self.error_rate),
+            ("rate_limit", self.rate_limit_rate),
+            ("hang", self.hang_rate),
+        ):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with mock._lock:
+                    fault = mock._pick_fault()
+                    mock.faults += fault is not None
+                if fault == "hang":
+                    time.sleep(mock.hang_seconds)
+                elif fault is not None:
+                    status = 500 if fault == "error" else 429
+                    self._send_json(status, {"error": {"message": f"Injected {fault}", "type": fault, "code": None}})
+                    return
+
+                prompt = "\n".join(message["content"] for message in request["messages"])
+                content = mock_content(prompt)
+                prompt_tokens = estimate_tokens(prompt)
+                completion_tokens = estimate_tokens(content)
+
+                with mock._lock:
+                    mock.calls += 1
+                    mock.prompt_tokens += prompt_tokens
+                    mock.completion_tokens += completion_tokens
+
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }
+                # Reading the prompt delays the first token
+                time.sleep(mock.per_prompt_token_latency * prompt_tokens)
+                if request.get("stream"):
+                    include_usage = (request.get("stream_options") or {}).get("include_usage")
+                    self._stream(request["model"], content, usage if include_usage else None)
+                    return
+                time.sleep(mock.base_latency + mock.per_token_latency * completion_tokens)
+
+                self._send_json(200, {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                })
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, model, content, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                time.sleep(mock.base_latency)
+                for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                    piece = content[start:start + STREAM_CHUNK_CHARS]
+                    time.sleep(mock.per_token_latency * len(piece) / 4)
+                    self._send_chunk(model, {"content": piece}, None)
+                self._send_chunk(model, {}, "stop")
+                if usage is not None:
+                    self._send_chunk(model, None, None, usage)
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def _send_chunk(self, model, delta, finish_reason, usage=None):
+                chunk = {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    # The usage chunk comes last and has no choices
+                    "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                if usage is not None:
+                    chunk["usage"] = usage
+                chunk = json.dumps(chunk)
+                self.wfile.write(f"data: {chunk}\n\n".encode())
+                self.wfile.flush()
+
+        return Handler
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.prompt_tokens = self.completion_tokens = self.faults = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
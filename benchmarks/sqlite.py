@@ -0,0 +1,16 @@
+"""In-memory SQLite in place of Postgres for benchmarks that touch the database."""
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import database
+import models  # noqa: F401, registers the tables on Base.metadata
+from database import Base
+
+
+def use_in_memory_database():
+    """Bind the session factories to a fresh in-memory SQLite database with every table created"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    database.SessionLocal.configure(bind=engine)
+    database.ReadSessionLocal.configure(bind=engine)
+    return engine
@@ -0,0 +1,124 @@
+"""Content-addressed store for CV files on the local filesystem.
+
+A blob lives at ``<cv_store_path>/ab/cd/<sha256 hex>``, named by the SHA-256
+of its content, so identical uploads are stored once and a blob never
+changes after it is written. Rows refer to blobs by that hash.
+
+Writes stream to a temporary file under ``<cv_store_path>/tmp`` and are
+renamed into place, so readers never see a partial blob. Reads are
+memory-mapped: the PDF parser and the download endpoint work on the page
+cache instead of copies of the file.
+
+Blobs are not deleted when users go away, another user may share them.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+import metrics
+from config import settings
+
+
+def path_for(digest: str) -> str:
+    return os.path.join(settings.cv_store_path, digest[:2], digest[2:4], digest)
+
+
+class BlobWriter:
+    """Streams a blob into the store, hashing it on the way
+
+    Chunks go to a temporary file under the store root until commit() moves
+    it into place, or drops it if an identical blob is already stored.
+    Leaving the with block without committing discards the file.
+    """
+
+    def __init__(self):
+        directory = os.path.join(settings.cv_store_path, "tmp")
+        os.makedirs(directory, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=directory, prefix="upload-", delete=False)
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.committed = False
+
+    def __enter__(self) -> "BlobWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.committed:
+            self._file.close()
+            os.unlink(self._file.name)
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    @contextmanager
+    def open_mapped(self) -> Iterator[mmap.mmap]:
+        """Read-only memory map of what was written so far, to validate it before commit"""
+        self._file.flush()
+        mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+    def commit(self) -> Tuple[str, int]:
+        """Store the blob, returns its (sha256 hex, size)"""
+        if not self.size:
+            # Empty files cannot be memory-mapped
+            raise ValueError("Cannot store an empty blob")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self.committed = True
+
+        digest = self._hash.hexdigest()
+        path = path_for(digest)
+        if os.path.exists(path):
+            os.unlink(self._file.name)
+            metrics.increment("cv_store.deduplicated")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._file.name, path)
+            metrics.increment("cv_store.written")
+        return digest, self.size
+
+
+def put(data: bytes) -> Tuple[str, int]:
+    """Store data unless an identical blob exists, returns its (sha256 hex, size)"""
+    with BlobWriter() as writer:
+        writer.write(data)
+        return writer.commit()
+
+
+def _map(digest: str) -> mmap.mmap:
+    with open(path_for(digest), "rb") as blob:
+        # The mapping keeps its own handle on the file
+        return mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@contextmanager
+def open_mapped(digest: str) -> Iterator[mmap.mmap]:
+    """Read-only memory map of a blob for the duration of the block
+
+    The map is file-like as well as a buffer, so parsers can seek and read it
+    directly. Raises FileNotFoundError if the blob is missing.
+    """
+    mapped = _map(digest)
+    try:
+        yield mapped
+    finally:
+        mapped.close()
+
+
+def view(digest: str) -> memoryview:
+    """Read-only view of a blob that stays valid for as long as it is referenced
+
+    For responses streamed after the handler returned: slices of the view can
+    be handed to the server as they are, the mapping goes away with the last
+    of them. Raises FileNotFoundError if the blob is missing.
+    """
+    return memoryview(_map(digest))
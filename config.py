@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -12,7 +13,80 @@ class Settings(BaseSettings):
     email_sender: str
     email_password: str
     database_url: str
-    apikey: str                
+    apikey: str
+    # Comma separated list of read replica URLs; empty means primary only
+    database_replica_urls: str = ""
+    database_replica_cooldown_seconds: int = 30
+    smtp_host: str = "smtp.gmail.com"
+    smtp_port: int = 465
+    smtp_use_ssl: bool = True
+    email_batch_size: int = 50
+    email_max_attempts: int = 5
+    email_poll_interval_seconds: float = 2.0
+    # A claimed email is retried by any worker once this passes without an outcome
+    email_send_lease_seconds: int = 300
+    # Point at a local OpenAI-compatible server for offline runs
+    openai_base_url: Optional[str] = None
+    # live, record, replay or mock (see llm_transport.py)
+    llm_mode: str = "live"
+    llm_record_path: str = "llm_records.jsonl.gz"
+    # Simulated response time in replay and mock modes
+    llm_synthetic_latency_seconds: float = 0.2
+    llm_synthetic_seconds_per_token: float = 0.002
+    openai_timeout_seconds: float = 30.0
+    # Total time a call may take, retries included
+    openai_deadline_seconds: float = 60.0
+    openai_evaluation_deadline_seconds: float = 20.0
+    openai_max_retries: int = 2
+    openai_retry_base_delay_seconds: float = 0.5
+    openai_retry_max_delay_seconds: float = 8.0
+    # Retries may add at most this fraction of extra calls
+    openai_retry_budget_ratio: float = 0.2
+    openai_retry_budget_capacity: int = 10
+    openai_breaker_failure_ratio: float = 0.5
+    openai_breaker_min_calls: int = 10
+    openai_breaker_window_seconds: float = 30.0
+    openai_breaker_open_seconds: float = 30.0
+    openai_max_connections: int = 20
+    openai_concurrency: int = 5
+    # Model and completion cap per SkillAssessment operation
+    llm_question_model: str = "gpt-3.5-turbo"
+    llm_question_max_tokens: int = 2000
+    llm_react_ui_task_model: str = "gpt-3.5-turbo"
+    llm_react_ui_task_max_tokens: int = 1000
+    llm_evaluation_model: str = "gpt-3.5-turbo"
+    llm_evaluation_max_tokens: int = 400
+    llm_evaluation_batch_item_max_tokens: int = 250
+    # Skills beyond this many estimated tokens are left out of generation prompts
+    llm_skills_prompt_tokens: int = 64
+    # Batch grading packs short answers into one prompt up to these limits
+    openai_batch_prompt_tokens: int = 3000
+    openai_batch_max_items: int = 10
+    question_bank_ttl_hours: int = 72
+    question_bank_max_per_key: int = 200
+    question_bank_target_depth: int = 30
+    question_bank_prewarm_top_skill_sets: int = 10
+    question_bank_prewarm_interval_seconds: int = 3600
+    ui_task_catalog_depth: int = 3
+    ui_task_catalog_refill_interval_seconds: int = 600
+    assessment_exam_ttl_hours: int = 24
+    assessment_cache_size: int = 1000
+    evaluation_cache_size: int = 10000
+    llm_usage_flush_interval_seconds: float = 5.0
+    # Default LLM token quota of every user, roles are unlimited unless overridden
+    llm_quota_tokens_per_hour: int = 100000
+    llm_quota_burst_tokens: int = 20000
+    # Anonymous callers share one bucket per client address, e.g. everyone behind a NAT
+    llm_quota_client_tokens_per_hour: int = 500000
+    llm_quota_client_burst_tokens: int = 100000
+    # Held from every bucket while a request runs and refunded after, bounds concurrent overshoot
+    llm_quota_reserve_tokens: int = 1000
+    llm_quota_flush_interval_seconds: float = 10.0
+    # Root of the content-addressed CV store (see blob_store.py), shared by every worker
+    cv_store_path: str = "cv_store"
+    # Uploads past either limit are rejected, the size as soon as it is exceeded
+    cv_max_bytes: int = 10 * 1024 * 1024
+    cv_max_pages: int = 20
 
     class Config:
         env_file = ".env"  # Load environment variables from the .env file
@@ -1,6 +1,11 @@
 import PyPDF2
+import asyncio
 import io
 import re
+from functools import lru_cache
+
+import blob_store
+from singleflight import SingleFlight
 
 # Try to use NLTK if available, but provide fallbacks
 try:
@@ -11,13 +16,54 @@ try:
 except ImportError:
     NLTK_AVAILABLE = False
 
+COMMON_STOPWORDS = {'a', 'an', 'the', 'and', 'or', 'but', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'of'}
+
+
+# Concurrent requests for the same document share one parse
+_analysis = SingleFlight("cv_analysis")
+
+
+@lru_cache(maxsize=1)
+def _english_stopwords():
+    # The NLTK corpus reader re-reads the word list on every call
+    return set(stopwords.words('english'))
+
+
 class CVProcessor:
+    @staticmethod
+    async def analyze(cv_hash, summary=True):
+        """Text, key info and optionally the summary of a stored CV, or None if it has no text
+
+        Parsing runs in a worker thread so it does not block the event loop,
+        reading the blob through a memory map instead of loading it.
+        The result is shared between concurrent callers and must not be mutated.
+        """
+        def parse():
+            try:
+                with blob_store.open_mapped(cv_hash) as pdf_data:
+                    text = CVProcessor.extract_text_from_pdf(pdf_data)
+            except FileNotFoundError:
+                print(f"CV blob {cv_hash} is missing from the store")
+                return None
+            if not text:
+                return None
+            return {
+                "text": text,
+                "key_info": CVProcessor.extract_key_info(text),
+                "summary": CVProcessor.generate_summary(text) if summary else None,
+            }
+
+        key = (cv_hash, summary)
+        analysis, _ = await _analysis.do(key, lambda: asyncio.to_thread(parse))
+        return analysis
+    
     @staticmethod
     def extract_text_from_pdf(pdf_data):
-        """Extract text from PDF binary data"""
+        """Extract text from PDF binary data or a seekable file-like object"""
         try:
             # Create a PDF reader object
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
+            stream = pdf_data if hasattr(pdf_data, "read") else io.BytesIO(pdf_data)
+            pdf_reader = PyPDF2.PdfReader(stream)
             
             # Extract text from all pages
             text = ""
@@ -30,6 +76,33 @@ class CVProcessor:
             print(f"Error extracting text from PDF: {e}")
             return None
     
+    @staticmethod
+    def count_pages(pdf_data):
+        """Number of pages of a PDF in binary data or a seekable file-like object, None if unreadable"""
+        try:
+            stream = pdf_data if hasattr(pdf_data, "read") else io.BytesIO(pdf_data)
+            return len(PyPDF2.PdfReader(stream).pages)
+        except Exception as e:
+            print(f"Error reading PDF: {e}")
+            return None
+
+    @staticmethod
+    def tokenize(text, remove_stopwords=True):
+        """Lowercase alphanumeric word tokens, optionally without stopwords"""
+        if NLTK_AVAILABLE:
+            try:
+                stop_words = _english_stopwords()
+                word_tokens = word_tokenize(text.lower())
+            except Exception:
+                # Fallback to simple word splitting
+                stop_words = COMMON_STOPWORDS
+                word_tokens = re.findall(r'\b\w+\b', text.lower())
+        else:
+            stop_words = COMMON_STOPWORDS
+            word_tokens = re.findall(r'\b\w+\b', text.lower())
+        
+        return [word for word in word_tokens if word.isalnum() and not (remove_stopwords and word in stop_words)]
+    
     @staticmethod
     def generate_summary(text, num_sentences=5):
         """Generate a summary of the given text"""
@@ -52,20 +125,7 @@ class CVProcessor:
                 return " ".join(sentences)
             
             # Simple word tokenization and stopword filtering
-            if NLTK_AVAILABLE:
-                try:
-                    stop_words = set(stopwords.words('english'))
-                    word_tokens = word_tokenize(text.lower())
-                    filtered_words = [word for word in word_tokens if word.isalnum() and word not in stop_words]
-                except Exception:
-                    # Fallback to simple word splitting
-                    common_stopwords = {'a', 'an', 'the', 'and', 'or', 'but', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'of'}
-                    word_tokens = re.findall(r'\b\w+\b', text.lower())
-                    filtered_words = [word for word in word_tokens if word.isalnum() and word not in common_stopwords]
-            else:
-                common_stopwords = {'a', 'an', 'the', 'and', 'or', 'but', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'of'}
-                word_tokens = re.findall(r'\b\w+\b', text.lower())
-                filtered_words = [word for word in word_tokens if word.isalnum() and word not in common_stopwords]
+            filtered_words = CVProcessor.tokenize(text)
             
             # Calculate word frequencies
             word_freq = {}
@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, Insert, Update, Delete
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from config import settings
+import itertools
+import logging
+import threading
+import time
 import os
 
 # Check if running in Docker (environment variable set in docker-compose.yml)
@@ -18,8 +23,114 @@ else:
 # Initialize the database engine
 engine = create_engine(sqlAlchemyDatabaseUrl)
 
+logger = logging.getLogger(__name__)
+
+
+class ReplicaPool:
+    """Round-robin selection over read replicas.
+
+    A replica that fails to connect or drops its connection is evicted for
+    ``cooldown`` seconds; when every replica is evicted reads fall back to
+    the primary.
+    """
+
+    def __init__(self, urls, cooldown):
+        self.engines = [create_engine(url, pool_pre_ping=True) for url in urls]
+        self.cooldown = cooldown
+        self._order = itertools.cycle(range(len(self.engines)))
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+        for replica in self.engines:
+            event.listen(replica, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        # connection is None when the replica could not be reached at all
+        if context.is_disconnect or context.connection is None:
+            self.evict(context.engine)
+
+    def evict(self, replica):
+        with self._lock:
+            index = self.engines.index(replica)
+            now = time.monotonic()
+            if self._down_until.get(index, 0) > now:
+                return
+            self._down_until[index] = now + self.cooldown
+        logger.warning("Evicting read replica %s for %ss", replica.url, self.cooldown)
+
+    def pick(self):
+        with self._lock:
+            now = time.monotonic()
+            for _ in range(len(self.engines)):
+                index = next(self._order)
+                if self._down_until.get(index, 0) <= now:
+                    return self.engines[index]
+        return None
+
+    def connectable(self, replica):
+        """Check out a connection to see whether the replica answers, evicting it if not"""
+        try:
+            with replica.connect():
+                return True
+        except OperationalError:
+            self.evict(replica)
+            return False
+
+
+replica_urls = [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()]
+replicas = ReplicaPool(replica_urls, settings.database_replica_cooldown_seconds) if replica_urls else None
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica when ``info["use_replica"]`` is set.
+
+    Once the session writes anything it is pinned to the primary so the rest
+    of the request reads its own writes. A session sticks to the first
+    replica that accepts a connection; when none does, it reads from the
+    primary instead of failing the request.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if isinstance(clause, (Insert, Update, Delete)):
+            self.info["pinned"] = True
+
+        if (
+            replicas is not None
+            and self.info.get("use_replica")
+            and not self.info.get("pinned")
+            and not self._flushing
+        ):
+            replica = self.info.get("replica")
+            if replica is None:
+                replica = self._connectable_replica()
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+    def _connectable_replica(self):
+        for _ in range(len(replicas.engines)):
+            replica = replicas.pick()
+            if replica is None:
+                break
+            if replicas.connectable(replica):
+                self.info["replica"] = replica
+                return replica
+        # Nothing reachable, the rest of the request reads from the primary
+        self.info["pinned"] = True
+        return None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_to_primary(session, flush_context):
+    session.info["pinned"] = True
+
+
 # Create a session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, info={"use_replica": True}
+)
 Base = declarative_base()
 
 
@@ -40,3 +151,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Read-only endpoints get their own session so replica routing and write
+# pinning never leak into the shared primary session
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
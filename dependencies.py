@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 from fastapi import Depends
 from database import get_db
 from models import User, Role, RolePermission, Permission, Session
+import queries
+import llm_usage
 
 
 
@@ -15,7 +17,7 @@ async def get_user_from_session(
     if not SESSION:
         raise HTTPException(status_code=401, detail="Invalid session token")
 
-    session = db.query(Session).filter(Session.id == SESSION).first()
+    session = queries.get_session(db, SESSION)
     if session is None:
         raise HTTPException(status_code=401, detail="Invalid session token")
     else:
@@ -25,19 +27,10 @@ async def get_user_from_session(
             raise HTTPException(status_code=401, detail="Session token expired")
 
         else:
-            user = db.query(User).filter(User.id == session.user_id).first()
-            role = db.query(Role).filter(Role.id == user.role_id).first()
-            role_permissions = (
-                db.query(RolePermission).filter(RolePermission.role_id == role.id).all()
-            )
-            permissions = []
-            for rp in role_permissions:
-                permission = (
-                    db.query(Permission)
-                    .filter(Permission.id == rp.permission_id)
-                    .first()
-                )
-                permissions.append(permission.name)
+            user = queries.get_user(db, session.user_id)
+            llm_usage.set_user(user.id)
+            role = queries.get_role(db, user.role_id)
+            permissions = queries.get_role_permissions(db, role.id)
 
          
 
@@ -47,3 +40,15 @@ async def get_user_from_session(
                 "email": user.email,
                 "role": {"id": role.id, "name": role.name, "permissions": permissions},
             }
+
+
+async def get_optional_user_from_session(
+    SESSION: Annotated[str, Cookie()] = None, db: Session = Depends(get_db)
+):
+    """get_user_from_session for routes anonymous callers may use too: None without a valid session"""
+    if not SESSION:
+        return None
+    try:
+        return await get_user_from_session(SESSION, db)
+    except HTTPException:
+        return None
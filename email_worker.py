@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import random
+import smtplib
+import ssl
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from config import settings
+from database import SessionLocal
+from models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Servers drop idle sessions, so check a connection that sat unused this long
+IDLE_CHECK_SECONDS = 30
+
+
+class SMTPConnection:
+    """A single authenticated SMTP connection reused across batches"""
+
+    def __init__(self):
+        self._server = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        if settings.smtp_use_ssl:
+            server = smtplib.SMTP_SSL(
+                settings.smtp_host, settings.smtp_port, context=ssl.create_default_context()
+            )
+        else:
+            server = smtplib.SMTP(settings.smtp_host, settings.smtp_port)
+        server.ehlo()
+        if server.has_extn("auth"):
+            server.login(settings.email_sender, settings.email_password)
+        return server
+
+    def get(self):
+        if self._server is not None and time.monotonic() - self._last_used > IDLE_CHECK_SECONDS:
+            try:
+                self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._server is None:
+            self._server = self._connect()
+        self._last_used = time.monotonic()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+
+def backoff(attempts: int) -> timedelta:
+    # 30s, 60s, 120s, ... capped at an hour, with jitter so retries spread out
+    seconds = min(30 * 2 ** (attempts - 1), 3600)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def claim_batch() -> list:
+    """Lease a batch of due emails to this worker and commit, so no locks are held while sending
+
+    A claimed row is not due again until email_send_lease_seconds have
+    passed; a worker that dies mid-batch leaves its rows to be reclaimed then.
+    """
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        now = datetime.utcnow()
+        emails = (
+            db.query(EmailOutbox)
+            .filter(EmailOutbox.status.in_(("pending", "sending")), EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.id)
+            .limit(settings.email_batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for email in emails:
+            email.status = "sending"
+            email.next_attempt_at = now + timedelta(seconds=settings.email_send_lease_seconds)
+        db.commit()
+        return emails
+    finally:
+        db.close()
+
+
+def deliver_batch(connection: SMTPConnection) -> int:
+    """Send one batch of due emails, returns how many rows were processed"""
+    emails = claim_batch()
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        for email in emails:
+            db.add(email)
+            message = EmailMessage()
+            message.set_content(email.body)
+            message["Subject"] = email.subject
+            message["From"] = settings.email_sender
+            message["To"] = email.receiver
+
+            try:
+                connection.get().send_message(message)
+            except (smtplib.SMTPException, OSError) as e:
+                # Drop the connection so the next email reconnects
+                connection.close()
+                email.attempts += 1
+                email.last_error = str(e)
+                if email.attempts >= settings.email_max_attempts:
+                    email.status = "failed"
+                    logger.error("Giving up on email %s to %s: %s", email.id, email.receiver, e)
+                else:
+                    email.status = "pending"
+                    email.next_attempt_at = datetime.utcnow() + backoff(email.attempts)
+            else:
+                email.status = "sent"
+                email.sent_at = datetime.utcnow()
+
+            # Record each outcome right away, a crash must not resend what went out
+            db.commit()
+        return len(emails)
+    finally:
+        db.close()
+
+
+async def run_email_worker():
+    """Deliver queued emails until cancelled"""
+    connection = SMTPConnection()
+    try:
+        while True:
+            try:
+                processed = await asyncio.to_thread(deliver_batch, connection)
+            except Exception as e:
+                logger.exception("Email delivery batch failed: %s", e)
+                processed = 0
+            if processed < settings.email_batch_size:
+                await asyncio.sleep(settings.email_poll_interval_seconds)
+    finally:
+        connection.close()
@@ -0,0 +1,131 @@
+"""Memoized short-answer evaluations.
+
+Keyed by a fingerprint of the question's rubric plus a hash of the
+answer with only case and whitespace normalized, so identical answers to
+the same pooled question are graded by the LLM once. Punctuation is kept:
+"x > 0" and "x < 0" are different answers. An in-memory LRU sits in front of the
+answer_evaluations table. Database reads and writes run in a worker
+thread so grading never blocks the event loop on them.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+
+import metrics
+from config import settings
+from database import SessionLocal
+from models import AnswerEvaluation
+
+logger = logging.getLogger(__name__)
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+# Part of every key; bump it when normalization changes so older rows are never matched
+KEY_VERSION = "2"
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def question_fingerprint(question: Dict[str, Any]) -> str:
+    rubric = {field: question.get(field) for field in ("question", "sample_answer", "key_points")}
+    return _sha256(json.dumps(rubric, sort_keys=True))
+
+
+def normalize_answer(answer: str) -> str:
+    return _WHITESPACE.sub(" ", answer.lower()).strip()
+
+
+def cache_key(question: Dict[str, Any], answer: str) -> str:
+    return f"{question_fingerprint(question)}:v{KEY_VERSION}:{_sha256(normalize_answer(answer))}"
+
+
+def _remember(key: str, evaluation: Dict[str, Any]):
+    with _lock:
+        _cache[key] = evaluation
+        _cache.move_to_end(key)
+        while len(_cache) > settings.evaluation_cache_size:
+            _cache.popitem(last=False)
+
+
+def _load(key: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        row = db.query(AnswerEvaluation).filter(AnswerEvaluation.key == key).first()
+        return row.evaluation if row is not None else None
+    finally:
+        db.close()
+
+
+def _store(key: str, evaluation: Dict[str, Any]):
+    db = SessionLocal()
+    try:
+        # Another worker may have graded the same answer meanwhile, its row stands
+        db.execute(
+            insert(AnswerEvaluation)
+            .values(key=key, evaluation=evaluation)
+            .on_conflict_do_nothing(index_elements=["key"])
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def get(key: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        evaluation = _cache.get(key)
+        if evaluation is not None:
+            _cache.move_to_end(key)
+    if evaluation is not None:
+        metrics.increment("evaluation_cache.memory_hit")
+        return dict(evaluation)
+
+    try:
+        evaluation = await asyncio.to_thread(_load, key)
+    except Exception as e:
+        # The database tier is an optimization, grade the answer instead
+        logger.exception("Loading evaluation %s failed: %s", key, e)
+        evaluation = None
+    if evaluation is None:
+        metrics.increment("evaluation_cache.miss")
+        return None
+
+    metrics.increment("evaluation_cache.db_hit")
+    _remember(key, evaluation)
+    return dict(evaluation)
+
+
+async def put(key: str, evaluation: Dict[str, Any]):
+    """Remember an evaluation; best effort, a failed write never fails grading"""
+    # Only complete evaluations are remembered, failed ones are retried next time
+    if not isinstance(evaluation, dict) or "error" in evaluation:
+        return
+    _remember(key, evaluation)
+
+    try:
+        await asyncio.to_thread(_store, key, evaluation)
+    except Exception as e:
+        logger.exception("Storing evaluation %s failed: %s", key, e)
+
+
+def stats() -> Dict[str, Any]:
+    counters = metrics.snapshot()["counters"]
+    hits = counters.get("evaluation_cache.memory_hit", 0) + counters.get("evaluation_cache.db_hit", 0)
+    misses = counters.get("evaluation_cache.miss", 0)
+    return {
+        "memory_hits": counters.get("evaluation_cache.memory_hit", 0),
+        "db_hits": counters.get("evaluation_cache.db_hit", 0),
+        "misses": misses,
+        "hit_rate": metrics.ratio(hits, misses),
+        "llm_evaluations_avoided": hits,
+    }
@@ -0,0 +1,118 @@
+"""Fail if a hot query falls back to a sequential scan on a large table.
+
+Seeds synthetic rows inside a transaction, runs EXPLAIN on the queries each
+router issues per request and rolls everything back afterwards.
+
+    python explain_check.py [--rows 20000] [--threshold 1000]
+"""
+import argparse
+import json
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+import queries
+from database import engine
+
+
+def endpoint_sql(statement) -> str:
+    """SQL of a statement an endpoint runs, with its parameters inlined"""
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+# (router, description, SQL, params) for the lookups run on every request
+HOT_QUERIES = [
+    ("auth", "user by email", "SELECT * FROM users WHERE email = :email", {"email": "explain-check-42@example.com"}),
+    ("auth", "session by user", "SELECT * FROM sessions WHERE user_id = :user_id", {"user_id": 42}),
+    ("auth", "reset token", "SELECT * FROM forgot_password WHERE token = :token", {"token": "t42"}),
+    ("dependencies", "session by id", "SELECT * FROM sessions WHERE id = :id", {"id": "explain-check-42"}),
+    ("dependencies", "permissions by role", "SELECT * FROM roles_permissions WHERE role_id = :role_id", {"role_id": 500}),
+    ("role", "users by role", "SELECT id FROM users WHERE role_id = :role_id", {"role_id": 500}),
+    ("jobseeker", "job by id", "SELECT * FROM jobs WHERE id = :id", {"id": 42}),
+    # The statement GET /api/jobseeker/jobs runs
+    ("jobseeker", "newest jobs", endpoint_sql(queries.newest_jobs_statement()), {}),
+]
+
+# Hot queries that return every row of a table, a seq scan of it is their plan
+FULL_LISTINGS = {("jobseeker", "newest jobs"): "jobs"}
+
+SEED = [
+    """
+    INSERT INTO roles (name)
+    SELECT 'EXPLAIN_CHECK_' || n FROM generate_series(1, 1000) AS n
+    """,
+    """
+    INSERT INTO roles_permissions (role_id, permission_id)
+    SELECT r.id, p.id FROM roles r CROSS JOIN permissions p
+    WHERE r.name LIKE 'EXPLAIN_CHECK_%'
+    """,
+    """
+    INSERT INTO users (name, email, password, role_id, created_at)
+    SELECT 'user ' || n, 'explain-check-' || n || '@example.com', 'x',
+           (SELECT id FROM roles WHERE name = 'EXPLAIN_CHECK_' || (n % 1000 + 1)), now()
+    FROM generate_series(1, :rows) AS n
+    """,
+    """
+    INSERT INTO sessions (id, user_id, expires)
+    SELECT 'explain-check-' || id, id, 0 FROM users WHERE email LIKE 'explain-check-%'
+    """,
+    """
+    INSERT INTO forgot_password (user_id, token, expires)
+    SELECT id, 't' || id, 0 FROM users WHERE email LIKE 'explain-check-%'
+    """,
+    """
+    INSERT INTO jobs (title, description, company_name, location, salary, created_at, skills, experience)
+    SELECT 'job ' || n, 'd', 'c', 'l', '0', now() - n * interval '1 minute', '[]', '0'
+    FROM generate_series(1, :rows) AS n
+    """,
+]
+
+
+def seq_scans(plan):
+    """Yield every relation read with a Seq Scan anywhere in the plan tree"""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000, help="synthetic rows per seeded table")
+    parser.add_argument("--threshold", type=int, default=1000, help="largest table a seq scan may read")
+    args = parser.parse_args()
+
+    failures = []
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            for statement in SEED:
+                conn.execute(text(statement), {"rows": args.rows} if ":rows" in statement else {})
+            conn.execute(text("ANALYZE"))
+
+            for router, description, sql, params in HOT_QUERIES:
+                plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                for table in seq_scans(plan[0]["Plan"]):
+                    if FULL_LISTINGS.get((router, description)) == table:
+                        continue
+                    rows = conn.execute(
+                        text("SELECT reltuples FROM pg_class WHERE relname = :table"),
+                        {"table": table},
+                    ).scalar()
+                    if rows > args.threshold:
+                        failures.append(f"{router}: {description} seq scans {table} ({int(rows)} rows)")
+        finally:
+            transaction.rollback()
+
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+    print(f"{len(HOT_QUERIES)} hot queries use indexes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Deterministic key-point grading for short answers.
+
+Scores how well an answer covers each key point using stemmed terms and
+bigram overlap. Scores far from the pass mark are returned as-is; anything
+in between is left for the LLM to decide.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+import metrics
+from cv_processor import CVProcessor
+
+try:
+    from nltk.stem import PorterStemmer
+    _stem = PorterStemmer().stem
+except ImportError:
+    def _stem(word):
+        for suffix in ("ing", "ed", "es", "s"):
+            if word.endswith(suffix) and len(word) > len(suffix) + 2:
+                return word[: -len(suffix)]
+        return word
+
+# A key point counts as covered at this overlap
+KEY_POINT_THRESHOLD = 0.6
+# Scores (0-10) at or beyond these bounds are confident enough to skip the LLM
+CONFIDENT_FAIL = 2
+CONFIDENT_PASS = 8
+
+
+def _terms(text: str) -> List[str]:
+    return [_stem(word) for word in CVProcessor.tokenize(text)]
+
+
+def _bigrams(terms: List[str]) -> set:
+    return set(zip(terms, terms[1:]))
+
+
+def key_point_coverage(key_point: str, answer_terms: set, answer_bigrams: set) -> float:
+    """Fraction of a key point's terms (and, for phrases, bigrams) found in the answer"""
+    terms = _terms(key_point)
+    if not terms:
+        return 1.0
+    unigram = len(set(terms) & answer_terms) / len(set(terms))
+    bigrams = _bigrams(terms)
+    if not bigrams:
+        return unigram
+    return 0.7 * unigram + 0.3 * len(bigrams & answer_bigrams) / len(bigrams)
+
+
+@dataclass
+class LocalGrade:
+    score: int
+    covered: List[str] = field(default_factory=list)
+    missed: List[str] = field(default_factory=list)
+    # False without key points: there is nothing to grade against, so the LLM decides
+    gradable: bool = True
+
+    @property
+    def confident(self) -> bool:
+        return self.gradable and (self.score <= CONFIDENT_FAIL or self.score >= CONFIDENT_PASS)
+
+    def evaluation(self) -> Dict[str, Any]:
+        return {
+            "score": self.score,
+            "feedback": f"You covered {len(self.covered)} out of {len(self.covered) + len(self.missed)} key points.",
+            "missing_points": self.missed,
+            "is_correct": self.score >= 7,
+            "graded_by": "local",
+        }
+
+
+def grade_answer(key_points: List[str], user_answer: str) -> LocalGrade:
+    start = time.perf_counter()
+    answer_terms = _terms(user_answer or "")
+    answer_term_set, answer_bigrams = set(answer_terms), _bigrams(answer_terms)
+
+    coverages = [key_point_coverage(point, answer_term_set, answer_bigrams) for point in key_points]
+    grade = LocalGrade(
+        score=round(10 * sum(coverages) / len(coverages)) if coverages else 0,
+        covered=[point for point, coverage in zip(key_points, coverages) if coverage >= KEY_POINT_THRESHOLD],
+        missed=[point for point, coverage in zip(key_points, coverages) if coverage < KEY_POINT_THRESHOLD],
+        gradable=bool(key_points),
+    )
+
+    metrics.observe("grading.local_seconds", time.perf_counter() - start)
+    metrics.increment("grading.local" if grade.confident else "grading.escalated")
+    return grade
+
+
+def stats() -> Dict[str, Any]:
+    """Escalation rate and the LLM time avoided by answers graded locally"""
+    counters = metrics.snapshot()["counters"]
+    local = counters.get("grading.local", 0)
+    escalated = counters.get("grading.escalated", 0)
+    return {
+        "graded_locally": local,
+        "escalated": escalated,
+        "escalation_rate": metrics.ratio(escalated, local),
+        "estimated_seconds_saved": round(
+            max(0.0, local * (metrics.mean("grading.llm_seconds") - metrics.mean("grading.local_seconds"))), 3
+        ),
+    }
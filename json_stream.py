@@ -0,0 +1,66 @@
+"""Incremental parsing of a JSON document that arrives in pieces.
+
+Streaming completions deliver the JSON a few characters at a time. The parser
+scans each new piece once, tracking nesting and string state, and hands back
+every top-level member as soon as it is complete: array elements for an
+array, ``(key, value)`` pairs for an object. Anything before the opening
+bracket (such as a markdown code fence) or after the closing one is ignored.
+"""
+import json
+from typing import Any, List
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._container = None
+        self._member_start = 0
+        self.done = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Add text and return the top-level members it completed"""
+        self._buffer += text
+        completed = []
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._depth > 0:
+                self._in_string = True
+            elif char in "[{":
+                if self._depth == 0:
+                    self._container = char
+                    self._member_start = self._pos + 1
+                self._depth += 1
+            elif char in "]}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(completed, self._pos)
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                self._emit(completed, self._pos)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _emit(self, completed: List[Any], end: int):
+        member = self._buffer[self._member_start:end].strip()
+        if not member:
+            return
+        try:
+            if self._container == "[":
+                completed.append(json.loads(member))
+            else:
+                completed.extend(json.loads("{" + member + "}").items())
+        except ValueError:
+            # A malformed member is dropped, the rest of the document still parses
+            pass
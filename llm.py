@@ -0,0 +1,199 @@
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+import llm_quota
+import llm_usage
+import metrics
+from config import settings
+from llm_transport import create_transport, estimate_tokens
+from resilience import CircuitBreaker, RetryBudget, backoff
+
+# One HTTP connection pool shared by every OpenAI call in the process
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_connections,
+    ),
+    timeout=settings.openai_timeout_seconds,
+)
+
+# Retries are ours (see _open), the client must not add its own on top
+client = AsyncOpenAI(
+    api_key=settings.apikey, base_url=settings.openai_base_url, http_client=http_client, max_retries=0
+)
+
+# live, record, replay or mock, see llm_transport
+transport = create_transport(settings.llm_mode, client)
+
+breaker = CircuitBreaker(
+    failure_ratio=settings.openai_breaker_failure_ratio,
+    min_calls=settings.openai_breaker_min_calls,
+    window_seconds=settings.openai_breaker_window_seconds,
+    open_seconds=settings.openai_breaker_open_seconds,
+)
+retry_budget = RetryBudget(ratio=settings.openai_retry_budget_ratio, capacity=settings.openai_retry_budget_capacity)
+
+# Failures that say the upstream is unhealthy, as opposed to a bad request
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMUnavailable(Exception):
+    """OpenAI could not answer in time: breaker open, deadline hit or retries exhausted"""
+
+    def __init__(self, message: str, retries: int = 0):
+        super().__init__(message)
+        self.retries = retries
+
+
+def resilience_stats() -> dict:
+    return {
+        "breaker": breaker.state,
+        "breaker_opened": breaker.times_opened,
+        "retry_budget": round(retry_budget.balance, 2),
+    }
+
+
+async def _open(create, deadline_at: float):
+    """Await create() under the deadline, retrying upstream failures with jittered backoff
+
+    Returns the result, the retries it took and the breaker ticket of the
+    attempt that succeeded.
+    """
+    ticket = breaker.allow()
+    if ticket is None:
+        metrics.increment("llm.breaker_rejected")
+        raise LLMUnavailable("OpenAI circuit breaker is open")
+
+    retry_budget.deposit()
+    retries = 0
+    while True:
+        try:
+            result = await asyncio.wait_for(create(), deadline_at - time.monotonic())
+        except RETRYABLE_ERRORS as e:
+            breaker.record(ticket, False)
+            delay = backoff(retries, settings.openai_retry_base_delay_seconds, settings.openai_retry_max_delay_seconds)
+            if retries >= settings.openai_max_retries:
+                raise LLMUnavailable(f"OpenAI call failed after {retries} retries: {e!r}", retries) from e
+            if time.monotonic() + delay >= deadline_at:
+                raise LLMUnavailable(f"OpenAI call deadline exceeded: {e!r}", retries) from e
+            if not retry_budget.withdraw():
+                metrics.increment("llm.retry_budget_exhausted")
+                raise LLMUnavailable(f"OpenAI retry budget exhausted: {e!r}", retries) from e
+            await asyncio.sleep(delay)
+            ticket = breaker.allow()
+            if ticket is None:
+                raise LLMUnavailable("OpenAI circuit breaker is open", retries) from e
+            retries += 1
+        except Exception:
+            # The upstream answered, the request itself was bad
+            breaker.record(ticket, True)
+            raise
+        else:
+            breaker.record(ticket, True)
+            return result, retries, ticket
+
+
+def _prompt_tokens(messages) -> int:
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def _request(messages, model: str, temperature: float, max_tokens: int) -> dict:
+    return {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+
+
+async def complete(
+    messages,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    operation: str = "completion",
+    deadline: Optional[float] = None,
+) -> str:
+    """Run a chat completion and return the message content"""
+    started = time.perf_counter()
+    deadline_at = time.monotonic() + (deadline or settings.openai_deadline_seconds)
+    request = _request(messages, model, temperature, max_tokens)
+    try:
+        completion, retries, _ = await _open(lambda: transport.complete(request), deadline_at)
+    except Exception as e:
+        # Failed or rejected calls are not billed
+        llm_usage.record(operation, model, time.perf_counter() - started, 0, 0, getattr(e, "retries", 0), e)
+        raise
+
+    llm_usage.record(
+        operation,
+        model,
+        time.perf_counter() - started,
+        completion.prompt_tokens,
+        completion.completion_tokens,
+        retries,
+    )
+    llm_quota.charge(completion.prompt_tokens + completion.completion_tokens)
+    return completion.content
+
+
+async def stream(
+    messages,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    operation: str = "completion",
+    deadline: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """Run a streaming chat completion, yielding content as it arrives
+
+    Only opening the stream is retried; once content has been yielded a
+    failure or the deadline ends the stream with LLMUnavailable.
+    """
+    started = time.perf_counter()
+    deadline_at = time.monotonic() + (deadline or settings.openai_deadline_seconds)
+    request = _request(messages, model, temperature, max_tokens)
+    usage = None
+    streamed = []
+    retries = 0
+    error = None
+    try:
+        chunks, retries, ticket = await _open(lambda: transport.open_stream(request), deadline_at)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), deadline_at - time.monotonic())
+                except StopAsyncIteration:
+                    break
+                except RETRYABLE_ERRORS as e:
+                    breaker.record(ticket, False)
+                    raise LLMUnavailable(f"OpenAI stream interrupted: {e!r}", retries) from e
+                if chunk.prompt_tokens is not None:
+                    usage = chunk
+                if chunk.content:
+                    streamed.append(chunk.content)
+                    yield chunk.content
+        finally:
+            await chunks.aclose()
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        # Without a usage chunk, estimate; a stream that never produced content is not billed
+        prompt_tokens = usage.prompt_tokens if usage else _prompt_tokens(messages) if streamed else 0
+        completion_tokens = usage.completion_tokens if usage else estimate_tokens("".join(streamed)) if streamed else 0
+        llm_usage.record(
+            operation,
+            model,
+            time.perf_counter() - started,
+            prompt_tokens,
+            completion_tokens,
+            getattr(error, "retries", retries),
+            error,
+        )
+        llm_quota.charge(prompt_tokens + completion_tokens)
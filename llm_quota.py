@@ -0,0 +1,273 @@
+"""Token-bucket quotas on LLM usage per user, per role and per anonymous client.
+
+Buckets are denominated in LLM tokens (prompt plus completion). Routes that
+call the LLM depend on require_llm_quota, which answers 429 while any bucket
+the caller draws from is empty. Otherwise it reserves llm_quota_reserve_tokens
+from every bucket in the same locked step, so concurrent requests cannot all
+be admitted against the same remaining tokens. The request's calls draw the
+tokens they actually used from the reservation first, anything beyond it is
+debited on top, and what is left is refunded when the request finishes,
+including after a failure. A large call can still take a bucket below zero
+and the caller waits for it to refill. Streaming routes finish, and refund,
+once their response starts; the tokens they stream are debited as they end.
+
+Users and anonymous clients get their default quota from settings unless an
+override exists in llm_quotas; roles are unlimited unless overridden. An
+anonymous client is an address that many people may share, so its default
+is larger than a user's. Buckets and usage counters live in process memory.
+A lifespan task flushes usage to llm_token_usage and reloads overrides every
+llm_quota_flush_interval_seconds, so each worker process enforces its own
+buckets.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import Cookie, Depends, HTTPException, Request
+from typing_extensions import Annotated
+
+import llm_usage
+import queries
+from config import settings
+from database import SessionLocal, get_db
+from models import LLMQuota, LLMTokenUsage
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("user", "role", "client")
+
+
+@dataclass
+class Quota:
+    tokens_per_hour: int
+    burst_tokens: int
+
+
+@dataclass
+class Reservation:
+    """Tokens taken from a request's buckets at admission, not yet used by its calls"""
+    subjects: List[Tuple[str, str]]
+    tokens: int
+
+
+class TokenBucket:
+    def __init__(self, quota: Quota):
+        self.quota = quota
+        self.level = float(quota.burst_tokens)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        refilled = self.level + (now - self.updated) * self.quota.tokens_per_hour / 3600
+        self.level = min(refilled, float(self.quota.burst_tokens))
+        self.updated = now
+
+    def resize(self, quota: Quota):
+        """Move to a new quota, a larger burst is credited right away"""
+        self._refill()
+        self.level = min(self.level + quota.burst_tokens - self.quota.burst_tokens, float(quota.burst_tokens))
+        self.quota = quota
+
+    def available(self) -> float:
+        self._refill()
+        return self.level
+
+    def debit(self, tokens: int):
+        self._refill()
+        self.level -= tokens
+
+    def credit(self, tokens: int):
+        self._refill()
+        self.level = min(self.level + tokens, float(self.quota.burst_tokens))
+
+    def seconds_until_available(self) -> float:
+        level = self.available()
+        if level > 0:
+            return 0.0
+        if self.quota.tokens_per_hour <= 0:
+            return math.inf
+        return (1 - level) * 3600 / self.quota.tokens_per_hour
+
+
+_lock = threading.Lock()
+_overrides: Dict[Tuple[str, str], Quota] = {}
+_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+# Tokens used per (scope, subject, day) since the last flush
+_usage = defaultdict(int)
+
+
+def default_quota(scope: str) -> Optional[Quota]:
+    if scope == "role":
+        return None
+    if scope == "client":
+        return Quota(settings.llm_quota_client_tokens_per_hour, settings.llm_quota_client_burst_tokens)
+    return Quota(settings.llm_quota_tokens_per_hour, settings.llm_quota_burst_tokens)
+
+
+def quota_for(scope: str, subject: str) -> Optional[Quota]:
+    """The quota a subject is held to, None when unlimited"""
+    return _overrides.get((scope, subject)) or default_quota(scope)
+
+
+def _bucket(scope: str, subject: str) -> Optional[TokenBucket]:
+    quota = quota_for(scope, subject)
+    if quota is None:
+        return None
+    bucket = _buckets.get((scope, subject))
+    if bucket is None:
+        bucket = _buckets[(scope, subject)] = TokenBucket(quota)
+    elif bucket.quota != quota:
+        bucket.resize(quota)
+    return bucket
+
+
+def available(scope: str, subject: str) -> Optional[float]:
+    with _lock:
+        bucket = _bucket(scope, subject)
+        return None if bucket is None else bucket.available()
+
+
+def set_quota(scope: str, subject: str, quota: Optional[Quota]):
+    """Apply an override right away instead of at the next reload, None removes it"""
+    with _lock:
+        if quota is None:
+            _overrides.pop((scope, subject), None)
+        else:
+            _overrides[(scope, subject)] = quota
+        _bucket(scope, subject)
+
+
+def charge(tokens: int):
+    """Debit the tokens a call used from the current request's reservation
+
+    Tokens the reservation still covers were debited at admission, only the
+    rest comes out of the buckets now. Calls outside a request are not charged.
+    """
+    reservation = llm_usage.quota_reservation()
+    if reservation is None or not tokens:
+        return
+    today = date.today()
+    with _lock:
+        covered = min(tokens, reservation.tokens)
+        reservation.tokens -= covered
+        for scope, subject in reservation.subjects:
+            bucket = _bucket(scope, subject)
+            if bucket is not None and tokens > covered:
+                bucket.debit(tokens - covered)
+            _usage[(scope, subject, today)] += tokens
+
+
+def release(reservation: Reservation):
+    """Refund the part of a reservation the request's calls did not use"""
+    with _lock:
+        for scope, subject in reservation.subjects:
+            bucket = _bucket(scope, subject)
+            if bucket is not None:
+                bucket.credit(reservation.tokens)
+        reservation.tokens = 0
+
+
+def pending_usage(scope: str, subject: str) -> Dict[date, int]:
+    """Usage not yet flushed to the database, by day"""
+    with _lock:
+        return {day: tokens for (s, sub, day), tokens in _usage.items() if (s, sub) == (scope, subject)}
+
+
+def _subjects(request: Request, session_id: Optional[str], db) -> List[Tuple[str, str]]:
+    session = queries.get_session(db, session_id) if session_id else None
+    if session is not None and session.expires >= time.time():
+        user = queries.get_user(db, session.user_id)
+        if user is not None:
+            llm_usage.set_user(user.id)
+            return [("user", str(user.id)), ("role", str(user.role_id))]
+    return [("client", request.client.host if request.client else "unknown")]
+
+
+async def require_llm_quota(
+    request: Request, SESSION: Annotated[str, Cookie()] = None, db=Depends(get_db)
+) -> AsyncIterator[None]:
+    """Route dependency: 429 while the caller's user, role or client bucket is empty
+
+    An admitted request holds a reservation on its buckets until it finishes.
+    """
+    subjects = _subjects(request, SESSION, db)
+    reservation = Reservation(subjects, settings.llm_quota_reserve_tokens)
+    with _lock:
+        buckets = []
+        for scope, subject in subjects:
+            bucket = _bucket(scope, subject)
+            wait = bucket.seconds_until_available() if bucket is not None else 0.0
+            if wait > 0:
+                retry_after = str(math.ceil(wait)) if math.isfinite(wait) else "3600"
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"LLM token quota exceeded for {scope}, retry in {retry_after}s",
+                    headers={"Retry-After": retry_after},
+                )
+            if bucket is not None:
+                buckets.append(bucket)
+        for bucket in buckets:
+            bucket.debit(reservation.tokens)
+    llm_usage.set_quota_reservation(reservation)
+    try:
+        yield
+    finally:
+        release(reservation)
+
+
+def flush():
+    """Write pending usage and reload the quota overrides"""
+    with _lock:
+        usage = dict(_usage)
+        _usage.clear()
+
+    db = SessionLocal()
+    try:
+        for (scope, subject, day), tokens in usage.items():
+            updated = (
+                db.query(LLMTokenUsage)
+                .filter(LLMTokenUsage.scope == scope, LLMTokenUsage.subject == subject, LLMTokenUsage.day == day)
+                .update({LLMTokenUsage.tokens: LLMTokenUsage.tokens + tokens}, synchronize_session=False)
+            )
+            if not updated:
+                db.add(LLMTokenUsage(scope=scope, subject=subject, day=day, tokens=tokens))
+        db.commit()
+
+        overrides = {
+            (row.scope, row.subject): Quota(row.tokens_per_hour, row.burst_tokens)
+            for row in db.query(LLMQuota).all()
+        }
+    except Exception:
+        # Put the usage back so the next flush retries it
+        with _lock:
+            for key, tokens in usage.items():
+                _usage[key] += tokens
+        raise
+    finally:
+        db.close()
+
+    with _lock:
+        _overrides.clear()
+        _overrides.update(overrides)
+
+
+async def run_quota_flusher():
+    """Flush usage and reload overrides until cancelled"""
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(flush)
+            except Exception as e:
+                logger.exception("LLM quota flush failed: %s", e)
+            await asyncio.sleep(settings.llm_quota_flush_interval_seconds)
+    finally:
+        try:
+            flush()
+        except Exception as e:
+            logger.exception("Final LLM quota flush failed: %s", e)
@@ -0,0 +1,285 @@
+"""Pluggable transports behind llm.complete and llm.stream.
+
+``settings.llm_mode`` picks one:
+
+- live: the OpenAI API.
+- record: the OpenAI API, with every request/response pair appended to
+  ``settings.llm_record_path`` (gzipped JSON lines).
+- replay: serves recorded responses, with synthetic latency and no
+  network.
+- mock: generates schema-valid payloads for the SkillAssessment prompts,
+  with synthetic latency and no network.
+
+Every transport returns the same normalized Completion and Chunk objects, so
+the deadline, retry and accounting logic in llm.py does not care which one
+is in use.
+"""
+import abc
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config import settings
+
+# Characters per synthetic stream chunk, a few tokens like the real API sends
+STREAM_CHUNK_CHARS = 16
+
+
+@dataclass
+class Completion:
+    content: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+@dataclass
+class Chunk:
+    """A piece of streamed content; the last chunk of a stream carries the usage"""
+    content: str = ""
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class ReplayMiss(Exception):
+    """Replay mode was asked for a request that was never recorded"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)"""
+    return len(text) // 4 + 1
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Identity of a completion request, the lookup key for replay"""
+    identity = {field: request.get(field) for field in ("model", "messages", "temperature", "max_tokens")}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _prompt(request: Dict[str, Any]) -> str:
+    return "\n".join(message["content"] for message in request["messages"])
+
+
+class LiveTransport:
+    def __init__(self, client):
+        self.client = client
+
+    async def complete(self, request: Dict[str, Any]) -> Completion:
+        response = await self.client.chat.completions.create(**request)
+        content = response.choices[0].message.content or ""
+        usage = response.usage
+        return Completion(
+            content=content,
+            prompt_tokens=usage.prompt_tokens if usage else estimate_tokens(_prompt(request)),
+            completion_tokens=usage.completion_tokens if usage else estimate_tokens(content),
+        )
+
+    async def open_stream(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+        response = await self.client.chat.completions.create(
+            **request, stream=True, stream_options={"include_usage": True}
+        )
+        return self._chunks(response)
+
+    @staticmethod
+    async def _chunks(response) -> AsyncIterator[Chunk]:
+        try:
+            async for chunk in response:
+                # The final chunk carries the usage and no choices
+                if chunk.usage is not None:
+                    yield Chunk(
+                        prompt_tokens=chunk.usage.prompt_tokens, completion_tokens=chunk.usage.completion_tokens
+                    )
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield Chunk(content=chunk.choices[0].delta.content)
+        finally:
+            await response.close()
+
+
+class RecordStore:
+    """Recorded responses keyed by request_key, in a gzipped JSON lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, request: Dict[str, Any], completion: Completion):
+        line = json.dumps({
+            "key": request_key(request),
+            "model": request["model"],
+            "content": completion.content,
+            "prompt_tokens": completion.prompt_tokens,
+            "completion_tokens": completion.completion_tokens,
+        }, separators=(",", ":"))
+        # Each append is its own gzip member, readers see one concatenated stream
+        with self._lock, gzip.open(self.path, "at", encoding="utf-8") as store:
+            store.write(line + "\n")
+
+    def load(self) -> Dict[str, List[Completion]]:
+        records = defaultdict(list)
+        if not os.path.exists(self.path):
+            return records
+        with gzip.open(self.path, "rt", encoding="utf-8") as store:
+            for line in store:
+                record = json.loads(line)
+                records[record["key"]].append(
+                    Completion(record["content"], record["prompt_tokens"], record["completion_tokens"])
+                )
+        return records
+
+
+class RecordingTransport:
+    def __init__(self, inner, store: RecordStore):
+        self.inner = inner
+        self.store = store
+
+    async def complete(self, request: Dict[str, Any]) -> Completion:
+        completion = await self.inner.complete(request)
+        await asyncio.to_thread(self.store.append, request, completion)
+        return completion
+
+    async def open_stream(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+        return self._recorded(request, await self.inner.open_stream(request))
+
+    async def _recorded(self, request: Dict[str, Any], chunks: AsyncIterator[Chunk]) -> AsyncIterator[Chunk]:
+        content = []
+        usage = None
+        try:
+            async for chunk in chunks:
+                content.append(chunk.content)
+                if chunk.prompt_tokens is not None:
+                    usage = chunk
+                yield chunk
+        finally:
+            await chunks.aclose()
+        # Only streams that ran to completion are worth replaying
+        if usage is not None:
+            completion = Completion("".join(content), usage.prompt_tokens, usage.completion_tokens)
+            await asyncio.to_thread(self.store.append, request, completion)
+
+
+class SyntheticTransport(abc.ABC):
+    """Base for transports that answer locally after a simulated delay"""
+
+    def __init__(self, base_latency: float, seconds_per_token: float):
+        self.base_latency = base_latency
+        self.seconds_per_token = seconds_per_token
+
+    @abc.abstractmethod
+    def _completion(self, request: Dict[str, Any]) -> Completion:
+        """The completion to answer request with"""
+
+    async def complete(self, request: Dict[str, Any]) -> Completion:
+        completion = self._completion(request)
+        await asyncio.sleep(self.base_latency + self.seconds_per_token * completion.completion_tokens)
+        return completion
+
+    async def open_stream(self, request: Dict[str, Any]) -> AsyncIterator[Chunk]:
+        completion = self._completion(request)
+        await asyncio.sleep(self.base_latency)
+        return self._chunks(completion)
+
+    async def _chunks(self, completion: Completion) -> AsyncIterator[Chunk]:
+        for start in range(0, len(completion.content), STREAM_CHUNK_CHARS):
+            piece = completion.content[start:start + STREAM_CHUNK_CHARS]
+            await asyncio.sleep(self.seconds_per_token * len(piece) / 4)
+            yield Chunk(content=piece)
+        yield Chunk(prompt_tokens=completion.prompt_tokens, completion_tokens=completion.completion_tokens)
+
+
+class ReplayTransport(SyntheticTransport):
+    def __init__(self, store: RecordStore, base_latency: float, seconds_per_token: float):
+        super().__init__(base_latency, seconds_per_token)
+        self.records = store.load()
+        self._next = defaultdict(int)
+
+    def _completion(self, request: Dict[str, Any]) -> Completion:
+        key = request_key(request)
+        recorded = self.records.get(key)
+        if not recorded:
+            raise ReplayMiss(f"No recorded response for request {key[:12]}")
+        # Repeats of a request cycle through its recordings in order, so runs are deterministic
+        index = self._next[key]
+        self._next[key] = index + 1
+        return recorded[index % len(recorded)]
+
+
+def _mock_evaluation(item_id=None) -> Dict[str, Any]:
+    result = {
+        "score": 7,
+        "feedback": "Covers the main ideas but misses some detail.",
+        "missing_points": ["Key point 3"],
+        "is_correct": True,
+    }
+    if item_id is not None:
+        result = {"id": item_id, **result}
+    return result
+
+
+def mock_content(prompt: str) -> str:
+    """A schema-valid answer to any of the SkillAssessment prompts"""
+    item_ids = [int(item_id) for item_id in re.findall(r"^\s*Item (\d+)$", prompt, re.MULTILINE)]
+    if item_ids:
+        return json.dumps([_mock_evaluation(item_id) for item_id in item_ids])
+    if "Evaluate the user's answer" in prompt:
+        return json.dumps(_mock_evaluation())
+    if "React UI development task" in prompt:
+        difficulty = re.search(r"with (\w+) difficulty", prompt)
+        return json.dumps({
+            "task_type": "dashboard",
+            "title": "Build a Metrics Dashboard",
+            "description": "Build a responsive dashboard with charts and filters.",
+            "requirements": ["Sidebar navigation", "Chart widgets", "Date filters"],
+            "bonus_features": ["Dark mode"],
+            "difficulty": difficulty.group(1) if difficulty else "medium",
+        })
+    count = re.search(r"with (\d+) questions", prompt)
+    mcq_count = re.search(r"Include (\d+) multiple-choice", prompt)
+    count = int(count.group(1)) if count else 5
+    mcq_count = int(mcq_count.group(1)) if mcq_count else 0
+    questions = []
+    for i in range(count):
+        if i < mcq_count:
+            questions.append({
+                "question": f"Question {i + 1}",
+                "type": "mcq",
+                "options": ["Option A", "Option B", "Option C", "Option D"],
+                "correct_answer": "Option A",
+                "explanation": "Option A is correct.",
+            })
+        else:
+            questions.append({
+                "question": f"Question {i + 1}",
+                "type": "short_answer",
+                "sample_answer": "A sample correct answer",
+                "key_points": ["Key point 1", "Key point 2", "Key point 3"],
+            })
+    return json.dumps(questions)
+
+
+class MockTransport(SyntheticTransport):
+    def _completion(self, request: Dict[str, Any]) -> Completion:
+        prompt = _prompt(request)
+        content = mock_content(prompt)
+        return Completion(content, estimate_tokens(prompt), estimate_tokens(content))
+
+
+def create_transport(mode: str, client):
+    if mode == "live":
+        return LiveTransport(client)
+    if mode == "record":
+        return RecordingTransport(LiveTransport(client), RecordStore(settings.llm_record_path))
+    if mode == "replay":
+        return ReplayTransport(
+            RecordStore(settings.llm_record_path),
+            settings.llm_synthetic_latency_seconds,
+            settings.llm_synthetic_seconds_per_token,
+        )
+    if mode == "mock":
+        return MockTransport(settings.llm_synthetic_latency_seconds, settings.llm_synthetic_seconds_per_token)
+    raise ValueError(f"Unknown llm_mode {mode!r}, expected live, record, replay or mock")
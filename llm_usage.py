@@ -0,0 +1,184 @@
+"""Accounting of every OpenAI call: latency, tokens, retries and cost.
+
+Calls are attributed to the route and user of the request that made them.
+LLMUsageMiddleware opens a context per request, and get_user_from_session
+fills in the user. require_llm_quota adds the quota reservation the request's
+calls are charged against. Totals per route are kept in-process for GET /metrics.
+Every call is also buffered and bulk inserted into the llm_calls table by
+run_usage_flusher.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert
+from starlette.middleware.base import BaseHTTPMiddleware
+
+import metrics
+from config import settings
+from database import SessionLocal
+from models import LLMCall
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+}
+
+# Calls made outside a request, e.g. by the question bank prewarmer
+BACKGROUND_ROUTE = "background"
+
+_current = contextvars.ContextVar("llm_call_context", default=None)
+
+_lock = threading.Lock()
+_routes = defaultdict(lambda: {
+    "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "seconds": 0.0,
+})
+# Bounded so a database outage cannot grow it without limit
+_pending = deque(maxlen=10000)
+
+
+class CallContext:
+    def __init__(self, scope):
+        self.scope = scope
+        self.user_id = None
+        self.quota_reservation = None
+
+    @property
+    def route(self) -> str:
+        # The router adds the matched route to the scope, prefer its path template
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path")
+
+
+@contextmanager
+def call_context(scope):
+    token = _current.set(CallContext(scope))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def set_user(user_id: int):
+    """Attribute the current request's LLM calls to a user"""
+    context = _current.get()
+    if context is not None:
+        context.user_id = user_id
+
+
+def set_quota_reservation(reservation):
+    """Charge the current request's LLM tokens against this llm_quota.Reservation"""
+    context = _current.get()
+    if context is not None:
+        context.quota_reservation = reservation
+
+
+def quota_reservation():
+    context = _current.get()
+    return context.quota_reservation if context is not None else None
+
+
+def cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+def record(
+    operation: str,
+    model: str,
+    seconds: float,
+    prompt_tokens: int,
+    completion_tokens: int,
+    retries: Optional[int],
+    error: Optional[Exception] = None,
+):
+    context = _current.get()
+    route = context.route if context is not None else BACKGROUND_ROUTE
+    user_id = context.user_id if context is not None else None
+    call_cost = cost(model, prompt_tokens, completion_tokens)
+
+    metrics.histogram(f"llm.{operation}.seconds", seconds)
+    metrics.increment("llm.calls")
+    metrics.increment("llm.prompt_tokens", prompt_tokens)
+    metrics.increment("llm.completion_tokens", completion_tokens)
+    metrics.increment("llm.retries", retries or 0)
+    if error is not None:
+        metrics.increment("llm.errors")
+
+    with _lock:
+        totals = _routes[route]
+        totals["calls"] += 1
+        totals["errors"] += error is not None
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        totals["cost_usd"] += call_cost
+        totals["seconds"] += seconds
+
+    _pending.append({
+        "created_at": datetime.utcnow(),
+        "route": route,
+        "user_id": user_id,
+        "operation": operation,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_ms": seconds * 1000,
+        "retries": retries,
+        "cost_usd": call_cost,
+        "error": None if error is None else f"{type(error).__name__}: {error}"[:500],
+    })
+
+
+def stats() -> dict:
+    with _lock:
+        routes = {route: dict(totals) for route, totals in _routes.items()}
+    return {
+        "cost_usd": round(sum(totals["cost_usd"] for totals in routes.values()), 6),
+        "routes": routes,
+    }
+
+
+def flush() -> int:
+    """Insert the buffered calls, returns how many were written"""
+    rows = []
+    while _pending:
+        rows.append(_pending.popleft())
+    if not rows:
+        return 0
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(LLMCall), rows)
+        db.commit()
+    except Exception as e:
+        # Usage rows are best effort, a failed batch is dropped rather than retried
+        logger.exception("Dropping %d LLM call records: %s", len(rows), e)
+        return 0
+    finally:
+        db.close()
+    return len(rows)
+
+
+async def run_usage_flusher():
+    """Write buffered call records until cancelled"""
+    try:
+        while True:
+            await asyncio.sleep(settings.llm_usage_flush_interval_seconds)
+            await asyncio.to_thread(flush)
+    finally:
+        flush()
+
+
+class LLMUsageMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        with call_context(request.scope):
+            return await call_next(request)
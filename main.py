@@ -1,14 +1,60 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from router import auth, user, role, admin, jobseeker
+from query_budget import QueryBudgetMiddleware
+import metrics
+import queries
+import grading
+import evaluation_cache
+import llm_usage
+from llm_usage import LLMUsageMiddleware, run_usage_flusher
+from llm_quota import run_quota_flusher
+from email_worker import run_email_worker
+from question_bank import run_prewarmer
+from ui_task_catalog import run_catalog_refiller
+import llm
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background workers run for the lifetime of the app
+    tasks = [
+        asyncio.create_task(run_email_worker()),
+        asyncio.create_task(run_prewarmer()),
+        asyncio.create_task(run_catalog_refiller()),
+        asyncio.create_task(run_usage_flusher()),
+        asyncio.create_task(run_quota_flusher()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    # Let them unwind, final flushes included, before what they use is closed
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await llm.http_client.aclose()
+
+
+# orjson encodes responses, datetimes included, several times faster than the stdlib encoder
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Health check endpoint
 @app.get("/ping")
 def read_root():
     return {"v": "1"}
 
+
+@app.get("/metrics")
+def read_metrics():
+    return {
+        **metrics.snapshot(),
+        "statement_cache": queries.statement_cache_stats(),
+        "grading": grading.stats(),
+        "evaluation_cache": evaluation_cache.stats(),
+        "llm": {**llm_usage.stats(), **llm.resilience_stats()},
+    }
+
 # Define allowed origins
 origins = [
     "http://localhost:5173",
@@ -42,10 +88,20 @@ app.add_middleware(
         "Authorization",
         "Access-Control-Allow-Origin",
         "Access-Control-Allow-Credentials",
+        "X-DB-Query-Count",
+        "X-DB-Time-Ms",
+        "X-DB-Query-Budget-Exceeded",
+        "Retry-After",
     ],
     max_age=3600,
 )
 
+# Record query count and DB time per request and flag routes over budget
+app.add_middleware(QueryBudgetMiddleware)
+
+# Attribute OpenAI calls to the route and user that made them
+app.add_middleware(LLMUsageMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(user.router)
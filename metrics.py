@@ -0,0 +1,67 @@
+import threading
+from collections import defaultdict
+
+# Process-wide counters and timings, exposed through GET /metrics
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_timings = defaultdict(lambda: {"count": 0, "total": 0.0})
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+_histograms = defaultdict(lambda: {"count": 0, "total": 0.0, "buckets": [0] * len(BUCKETS)})
+
+
+def increment(name: str, value: int = 1):
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, seconds: float):
+    with _lock:
+        _timings[name]["count"] += 1
+        _timings[name]["total"] += seconds
+
+
+def histogram(name: str, seconds: float):
+    """Like observe, but also counts the value into latency buckets"""
+    with _lock:
+        histogram = _histograms[name]
+        histogram["count"] += 1
+        histogram["total"] += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][index] += 1
+                break
+
+
+def mean(name: str) -> float:
+    with _lock:
+        timing = _timings.get(name)
+        return timing["total"] / timing["count"] if timing and timing["count"] else 0.0
+
+
+def ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timings": {
+                name: {**timing, "mean": timing["total"] / timing["count"] if timing["count"] else 0.0}
+                for name, timing in _timings.items()
+            },
+            "histograms": {
+                name: {
+                    "count": histogram["count"],
+                    "total": histogram["total"],
+                    "buckets": {
+                        "+Inf" if bound == float("inf") else str(bound): count
+                        for bound, count in zip(BUCKETS, histogram["buckets"])
+                    },
+                }
+                for name, histogram in _histograms.items()
+            },
+        }
@@ -0,0 +1,38 @@
+"""resync id sequences
+
+Revision ID: 3c7d1a9e5b42
+Revises: f2e8ef92231a
+Create Date: 2026-10-19 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7d1a9e5b42'
+down_revision: Union[str, None] = 'f2e8ef92231a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Seed data and the old max(id)+1 allocation inserted explicit ids, so the
+# serial sequences behind these tables never advanced
+TABLES = ['roles', 'permissions', 'roles_permissions', 'users', 'forgot_password', 'jobs']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        # Make sure every id column is backed by a sequence default
+        op.execute(f"CREATE SEQUENCE IF NOT EXISTS {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+        op.execute(
+            f"SELECT setval('{table}_id_seq', COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        )
+
+
+def downgrade() -> None:
+    # The sequences are left in place; advancing them is harmless
+    pass
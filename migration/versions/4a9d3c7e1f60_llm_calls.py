@@ -0,0 +1,49 @@
+"""llm calls
+
+Revision ID: 4a9d3c7e1f60
+Revises: b83f5d1e6a04
+Create Date: 2026-10-19 16:02:17.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9d3c7e1f60'
+down_revision: Union[str, None] = 'b83f5d1e6a04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_calls',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('route', sa.String(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('operation', sa.String(), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('prompt_tokens', sa.Integer(), nullable=False),
+    sa.Column('completion_tokens', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Float(), nullable=False),
+    sa.Column('retries', sa.Integer(), nullable=True),
+    sa.Column('cost_usd', sa.Float(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_llm_calls_id'), 'llm_calls', ['id'], unique=False)
+    op.create_index(op.f('ix_llm_calls_created_at'), 'llm_calls', ['created_at'], unique=False)
+    op.create_index(op.f('ix_llm_calls_route'), 'llm_calls', ['route'], unique=False)
+    op.create_index(op.f('ix_llm_calls_user_id'), 'llm_calls', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_llm_calls_user_id'), table_name='llm_calls')
+    op.drop_index(op.f('ix_llm_calls_route'), table_name='llm_calls')
+    op.drop_index(op.f('ix_llm_calls_created_at'), table_name='llm_calls')
+    op.drop_index(op.f('ix_llm_calls_id'), table_name='llm_calls')
+    op.drop_table('llm_calls')
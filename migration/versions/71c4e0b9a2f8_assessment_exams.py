@@ -0,0 +1,35 @@
+"""assessment exams
+
+Revision ID: 71c4e0b9a2f8
+Revises: d2a6e8f41c73
+Create Date: 2026-10-19 14:26:09.384175
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '71c4e0b9a2f8'
+down_revision: Union[str, None] = 'd2a6e8f41c73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('assessment_exams',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('questions', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_assessment_exams_id'), 'assessment_exams', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_assessment_exams_id'), table_name='assessment_exams')
+    op.drop_table('assessment_exams')
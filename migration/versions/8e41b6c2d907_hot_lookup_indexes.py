@@ -0,0 +1,51 @@
+"""hot lookup indexes
+
+Revision ID: 8e41b6c2d907
+Revises: 3c7d1a9e5b42
+Create Date: 2026-10-19 11:02:17.653920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41b6c2d907'
+down_revision: Union[str, None] = '3c7d1a9e5b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_sessions_user_id'), 'sessions', ['user_id'], unique=False)
+    op.create_index(op.f('ix_forgot_password_token'), 'forgot_password', ['token'], unique=False)
+    op.create_index(op.f('ix_users_role_id'), 'users', ['role_id'], unique=False)
+    op.create_index(op.f('ix_jobs_created_at'), 'jobs', ['created_at'], unique=False)
+
+    # Drop duplicate assignments (keeping the oldest) before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM roles_permissions a
+        USING roles_permissions b
+        WHERE a.role_id = b.role_id
+          AND a.permission_id = b.permission_id
+          AND a.id > b.id
+        """
+    )
+    # role_id leads the constraint's index, which covers the per-role permission lookup
+    op.create_unique_constraint(
+        'uq_roles_permissions_role_id_permission_id',
+        'roles_permissions',
+        ['role_id', 'permission_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_roles_permissions_role_id_permission_id', 'roles_permissions', type_='unique')
+    op.drop_index(op.f('ix_jobs_created_at'), table_name='jobs')
+    op.drop_index(op.f('ix_users_role_id'), table_name='users')
+    op.drop_index(op.f('ix_forgot_password_token'), table_name='forgot_password')
+    op.drop_index(op.f('ix_sessions_user_id'), table_name='sessions')
@@ -0,0 +1,62 @@
+"""llm quotas
+
+Revision ID: 9e4b7c2d5a18
+Revises: c6f2a8d4b190
+Create Date: 2026-10-19 18:02:37.419256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7c2d5a18'
+down_revision: Union[str, None] = 'c6f2a8d4b190'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_quotas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('tokens_per_hour', sa.Integer(), nullable=False),
+    sa.Column('burst_tokens', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'subject', name='uq_llm_quotas_scope_subject')
+    )
+    op.create_index(op.f('ix_llm_quotas_id'), 'llm_quotas', ['id'], unique=False)
+    op.create_table('llm_token_usage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('tokens', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'subject', 'day', name='uq_llm_token_usage_scope_subject_day')
+    )
+    op.create_index(op.f('ix_llm_token_usage_id'), 'llm_token_usage', ['id'], unique=False)
+
+    # Ids come from the sequences, resynced in 3c7d1a9e5b42
+    op.execute("INSERT INTO permissions (name, category) VALUES ('MANAGE_LLM_QUOTA', 'POST')")
+    op.execute(
+        "INSERT INTO roles_permissions (role_id, permission_id) "
+        "SELECT 0, id FROM permissions WHERE name = 'MANAGE_LLM_QUOTA'"  # ADMIN role
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DELETE FROM roles_permissions WHERE permission_id IN "
+        "(SELECT id FROM permissions WHERE name = 'MANAGE_LLM_QUOTA')"
+    )
+    op.execute("DELETE FROM permissions WHERE name = 'MANAGE_LLM_QUOTA'")
+    op.drop_index(op.f('ix_llm_token_usage_id'), table_name='llm_token_usage')
+    op.drop_table('llm_token_usage')
+    op.drop_index(op.f('ix_llm_quotas_id'), table_name='llm_quotas')
+    op.drop_table('llm_quotas')
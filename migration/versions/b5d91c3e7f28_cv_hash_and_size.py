@@ -0,0 +1,31 @@
+"""cv hash and size
+
+Revision ID: b5d91c3e7f28
+Revises: 9e4b7c2d5a18
+Create Date: 2026-10-19 18:40:12.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d91c3e7f28'
+down_revision: Union[str, None] = '9e4b7c2d5a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('cv_hash', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('cv_size', sa.Integer(), nullable=True))
+    # Existing CVs get their hash and size when d83a6f1c2e94 moves them to the
+    # blob store in batches, rather than in one table-locking update here
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'cv_size')
+    op.drop_column('users', 'cv_hash')
@@ -0,0 +1,32 @@
+"""answer evaluations
+
+Revision ID: b83f5d1e6a04
+Revises: 71c4e0b9a2f8
+Create Date: 2026-10-19 15:08:44.519372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b83f5d1e6a04'
+down_revision: Union[str, None] = '71c4e0b9a2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('answer_evaluations',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('evaluation', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('answer_evaluations')
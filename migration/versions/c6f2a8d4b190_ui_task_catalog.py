@@ -0,0 +1,37 @@
+"""ui task catalog
+
+Revision ID: c6f2a8d4b190
+Revises: 4a9d3c7e1f60
+Create Date: 2026-10-19 17:11:52.603841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f2a8d4b190'
+down_revision: Union[str, None] = '4a9d3c7e1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ui_task_catalog',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('catalog_key', sa.String(), nullable=False),
+    sa.Column('task', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ui_task_catalog_id'), 'ui_task_catalog', ['id'], unique=False)
+    op.create_index(op.f('ix_ui_task_catalog_catalog_key'), 'ui_task_catalog', ['catalog_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ui_task_catalog_catalog_key'), table_name='ui_task_catalog')
+    op.drop_index(op.f('ix_ui_task_catalog_id'), table_name='ui_task_catalog')
+    op.drop_table('ui_task_catalog')
@@ -0,0 +1,38 @@
+"""question bank
+
+Revision ID: d2a6e8f41c73
+Revises: 5b9f02d7c3e1
+Create Date: 2026-10-19 13:41:52.730611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6e8f41c73'
+down_revision: Union[str, None] = '5b9f02d7c3e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('question_bank',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('skill_key', sa.String(), nullable=False),
+    sa.Column('question_type', sa.String(), nullable=False),
+    sa.Column('question', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_question_bank_id'), 'question_bank', ['id'], unique=False)
+    op.create_index('ix_question_bank_key_created_at', 'question_bank', ['skill_key', 'question_type', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_question_bank_key_created_at', table_name='question_bank')
+    op.drop_index(op.f('ix_question_bank_id'), table_name='question_bank')
+    op.drop_table('question_bank')
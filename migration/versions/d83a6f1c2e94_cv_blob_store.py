@@ -0,0 +1,99 @@
+"""cv blob store
+
+Revision ID: d83a6f1c2e94
+Revises: b5d91c3e7f28
+Create Date: 2026-10-19 21:05:37.184920
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from database import Base
+
+import blob_store
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd83a6f1c2e94'
+down_revision: Union[str, None] = 'b5d91c3e7f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger(f"alembic.{__name__}")
+
+# Rows moved per transaction, keeps locks short and memory bounded while the app runs
+BATCH_SIZE = 100
+
+
+def _columns(bind) -> set:
+    return {column['name'] for column in sa.inspect(bind).get_columns('users')}
+
+
+def upgrade() -> None:
+    # The batches below commit as they go, so a failed run leaves part of the
+    # move done; every step checks what is there and a rerun resumes
+    bind = op.get_bind()
+    columns = _columns(bind)
+    if 'cv_mime' not in columns:
+        op.add_column('users', sa.Column('cv_mime', sa.String(), nullable=True))
+    if 'cv' not in columns:
+        return
+
+    # Each batch commits on its own. Moved rows lose their bytes, so the loop
+    # also picks up CVs uploaded by the old code while it runs.
+    with op.get_context().autocommit_block():
+        while True:
+            rows = bind.execute(
+                sa.text("SELECT id, cv FROM users WHERE cv IS NOT NULL ORDER BY id LIMIT :limit"),
+                {"limit": BATCH_SIZE},
+            ).fetchall()
+            if not rows:
+                break
+            moved = []
+            for row in rows:
+                cv_hash, cv_size = blob_store.put(bytes(row.cv)) if row.cv else (None, None)
+                moved.append({"id": row.id, "cv_hash": cv_hash, "cv_size": cv_size})
+            bind.execute(
+                sa.text(
+                    "UPDATE users SET cv = NULL, cv_hash = :cv_hash, cv_size = :cv_size, "
+                    "cv_mime = CASE WHEN :cv_hash IS NULL THEN NULL ELSE 'application/pdf' END "
+                    "WHERE id = :id"
+                ),
+                moved,
+            )
+
+    op.drop_column('users', 'cv')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if 'cv' not in _columns(bind):
+        op.add_column('users', sa.Column('cv', sa.LargeBinary(), nullable=True))
+
+    last_id = 0
+    with op.get_context().autocommit_block():
+        while True:
+            rows = bind.execute(
+                sa.text(
+                    "SELECT id, cv_hash FROM users WHERE cv_hash IS NOT NULL AND id > :last_id "
+                    "ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": BATCH_SIZE},
+            ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                try:
+                    with blob_store.open_mapped(row.cv_hash) as blob:
+                        cv = blob[:]
+                except FileNotFoundError:
+                    # The user keeps no CV rather than stopping the downgrade halfway
+                    logger.warning("CV blob %s of user %s is missing, leaving cv empty", row.cv_hash, row.id)
+                    continue
+                bind.execute(sa.text("UPDATE users SET cv = :cv WHERE id = :id"), {"cv": cv, "id": row.id})
+            last_id = rows[-1].id
+
+    # Blobs stay in the store, they are harmless and another upgrade reuses them
+    op.drop_column('users', 'cv_mime')
@@ -1,5 +1,5 @@
 from database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, DateTime, LargeBinary
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, Date, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from sqlalchemy import Float
@@ -14,7 +14,7 @@ class Session(Base):
     __tablename__ = "sessions"
 
     id = Column(String, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     expires = Column(Float, nullable=False)
 
 
@@ -40,6 +40,10 @@ class Permission(Base):
 
 class RolePermission(Base):
     __tablename__ = "roles_permissions"
+    # Also serves role_id lookups, so role_id needs no index of its own
+    __table_args__ = (
+        UniqueConstraint("role_id", "permission_id", name="uq_roles_permissions_role_id_permission_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     role_id = Column(Integer, ForeignKey("roles.id"))
@@ -56,7 +60,7 @@ class User(Base):
     name = Column(String, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
-    role_id = Column(Integer, ForeignKey("roles.id"))
+    role_id = Column(Integer, ForeignKey("roles.id"), index=True)
 
     username = Column(String, nullable=True)
     contact = Column(String, nullable=True)
@@ -65,7 +69,10 @@ class User(Base):
     job_title = Column(String, nullable=True)
     message = Column(String, nullable=True)
     resume = Column(String, nullable=True)
-    cv = Column(LargeBinary, nullable=True)  # For storing CV PDF as binary data
+    # The CV file itself lives in blob_store under its hash
+    cv_hash = Column(String, nullable=True)  # SHA-256 hex digest of the CV, the download ETag
+    cv_size = Column(Integer, nullable=True)  # Length of the CV in bytes
+    cv_mime = Column(String, nullable=True)
     
 
     role = relationship("Role", back_populates="users")
@@ -77,7 +84,7 @@ class ForgotPassword(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    token = Column(String, nullable=False)
+    token = Column(String, nullable=False, index=True)
     expires = Column(Float, nullable=False)
 
 
@@ -90,9 +97,112 @@ class Job(Base):
     company_name = Column(String, nullable=False)
     location = Column(String, nullable=False)
     salary = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     
     skills = Column(JSON, nullable=False)
     experience = Column(JSON, nullable=False)
-    
-    
\ No newline at end of file
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    receiver = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+class QuestionBankEntry(Base):
+    __tablename__ = "question_bank"
+
+    id = Column(Integer, primary_key=True, index=True)
+    skill_key = Column(String, nullable=False)  # sorted, lowercased skills joined by "|"
+    question_type = Column(String, nullable=False)
+    question = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_question_bank_key_created_at", "skill_key", "question_type", "created_at"),
+    )
+
+
+class AssessmentExam(Base):
+    __tablename__ = "assessment_exams"
+
+    id = Column(String, primary_key=True, index=True)
+    questions = Column(JSON, nullable=False)  # full questions, each with a compact "id"
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires = Column(Float, nullable=False)
+
+
+class AnswerEvaluation(Base):
+    __tablename__ = "answer_evaluations"
+
+    key = Column(String, primary_key=True)  # question fingerprint and normalized answer hash
+    evaluation = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LLMCall(Base):
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    route = Column(String, nullable=False, index=True)  # path template, or "background"
+    user_id = Column(Integer, nullable=True, index=True)  # kept when the user is deleted
+    operation = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False)
+    completion_tokens = Column(Integer, nullable=False)
+    latency_ms = Column(Float, nullable=False)
+    retries = Column(Integer, nullable=True)
+    cost_usd = Column(Float, nullable=False)
+    error = Column(String, nullable=True)
+
+
+class UITaskCatalogEntry(Base):
+    __tablename__ = "ui_task_catalog"
+
+    id = Column(Integer, primary_key=True, index=True)
+    catalog_key = Column(String, nullable=False, index=True)  # ui_type|difficulty|sorted,features
+    task = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LLMQuota(Base):
+    __tablename__ = "llm_quotas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)  # user, role or client
+    subject = Column(String, nullable=False)  # user id, role id or client address
+    tokens_per_hour = Column(Integer, nullable=False)
+    burst_tokens = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "subject", name="uq_llm_quotas_scope_subject"),
+    )
+
+
+class LLMTokenUsage(Base):
+    __tablename__ = "llm_token_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    day = Column(Date, nullable=False)
+    tokens = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "subject", "day", name="uq_llm_token_usage_scope_subject_day"),
+    )
@@ -1,14 +1,164 @@
+import asyncio
 import json
-from typing import List, Dict, Any, Optional
-import openai
+import time
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import evaluation_cache
+import grading
+import llm
+import metrics
 from config import settings
+from json_stream import IncrementalJSONParser
+from singleflight import SingleFlight
+
+
+# Identical answers graded at the same time share one call
+_grading = SingleFlight("evaluate_answer")
+
+
+def _parse_json_content(content: str):
+    """Parse JSON from a completion, which may be wrapped in markdown code blocks"""
+    json_content = content
+    if "```json" in content:
+        json_content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        json_content = content.split("```")[1].split("```")[0].strip()
+    return json.loads(json_content)
+
+
+def _compact(template: str) -> str:
+    """Drop the indentation and blank lines of a prompt template"""
+    return "\n".join(line.strip() for line in template.strip().splitlines() if line.strip())
+
+
+QUESTIONS_SYSTEM = "You are a technical interviewer creating skill assessment questions."
+QUESTIONS_PROMPT = _compact("""
+    Generate a skill assessment with {num_questions} questions for a job candidate with the following skills: {skills}.
+    Include {mcq_count} multiple-choice questions and {short_answer_count} short answer questions.
+    For multiple-choice questions, provide 4 options with one correct answer.
+    Format the response as a JSON array of questions like these:
+    [{{"question": "Question text", "type": "mcq", "options": ["Option A", "Option B", "Option C", "Option D"], "correct_answer": "The correct option", "explanation": "Explanation of the correct answer"}}, {{"question": "Short answer question text", "type": "short_answer", "sample_answer": "A sample correct answer", "key_points": ["Key point 1", "Key point 2", "Key point 3"]}}]
+    Make sure the questions are challenging but appropriate for a technical interview.
+""")
+
+REACT_UI_TASK_SYSTEM = "You are a React developer creating UI development tasks."
+REACT_UI_TASK_PROMPT = _compact("""
+    Generate a detailed React UI development task for a {ui_type} with {difficulty} difficulty.
+    The UI should include these features: {features}.{context}
+    Format the response as a JSON object like this:
+    {{"task_type": "The type of UI task", "title": "A catchy title for the task", "description": "A detailed description of what to build", "requirements": ["Requirement 1", "Requirement 2"], "bonus_features": ["Bonus feature 1", "Bonus feature 2"], "difficulty": "{difficulty}"}}
+    Make the task challenging but appropriate for the {difficulty} difficulty level. Be creative and specific with the requirements.
+""")
+
+EVALUATION_SYSTEM = "You are a technical interviewer evaluating candidate responses."
+EVALUATION_PROMPT = _compact("""
+    Question: {question}
+    Sample correct answer: {sample_answer}
+    Key points that should be addressed: {key_points}
+    User's answer: {answer}
+    Evaluate the user's answer. Consider:
+    1. Does it address the key points?
+    2. Is it technically accurate?
+    3. How complete is the answer?
+    Return a JSON object formatted as:
+    {{"score": <0-10>, "feedback": "Detailed feedback on the answer", "missing_points": ["Any key points that were missed"], "is_correct": <true if score >= 7>}}
+""")
+
+BATCH_EVALUATION_PROMPT = _compact("""
+    Evaluate each candidate answer below. For each item consider whether it addresses the key points, is technically accurate and how complete it is.
+    {items}
+    Return a JSON array with one object per item, in the same order, formatted as:
+    [{{"id": <item number>, "score": <0-10>, "feedback": "Detailed feedback", "missing_points": ["Any key points that were missed"], "is_correct": <true if score >= 7>}}]
+""")
+
+
+def _skills_text(skills: List[str]) -> str:
+    """Skills without duplicates, cut off at settings.llm_skills_prompt_tokens"""
+    seen = set()
+    kept = []
+    tokens = 0
+    for skill in skills:
+        skill = " ".join(skill.split())
+        if not skill or skill.lower() in seen:
+            continue
+        # Plus the separator
+        skill_tokens = llm.estimate_tokens(skill) + 1
+        if kept and tokens + skill_tokens > settings.llm_skills_prompt_tokens:
+            metrics.increment("prompts.skills_truncated")
+            break
+        seen.add(skill.lower())
+        kept.append(skill)
+        tokens += skill_tokens
+    return ", ".join(kept)
+
+
+def _question_messages(skills: List[str], num_questions: int, question_type: str) -> List[Dict[str, str]]:
+    """Chat messages asking for an assessment of the given skills"""
+    # Determine question type distribution
+    mcq_count = 0
+    short_answer_count = 0
+    
+    if question_type == "mcq":
+        mcq_count = num_questions
+    elif question_type == "short_answer":
+        short_answer_count = num_questions
+    else:  # mixed
+        mcq_count = num_questions // 2
+        short_answer_count = num_questions - mcq_count
+    
+    prompt = QUESTIONS_PROMPT.format(
+        num_questions=num_questions,
+        skills=_skills_text(skills),
+        mcq_count=mcq_count,
+        short_answer_count=short_answer_count,
+    )
+    return [
+        {"role": "system", "content": QUESTIONS_SYSTEM},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _react_ui_task_messages(ui_type: str, difficulty: str, features: List[str], description: Optional[str]) -> List[Dict[str, str]]:
+    """Chat messages asking for a React UI task"""
+    prompt = REACT_UI_TASK_PROMPT.format(
+        ui_type=ui_type,
+        difficulty=difficulty,
+        features=", ".join(features) if features else "none specified",
+        context=f"\nAdditional context: {description}" if description else "",
+    )
+    return [
+        {"role": "system", "content": REACT_UI_TASK_SYSTEM},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _evaluation_messages(question: Dict[str, Any], user_answer: str) -> List[Dict[str, str]]:
+    """Chat messages asking for a grade of one short answer"""
+    prompt = EVALUATION_PROMPT.format(
+        question=question["question"],
+        sample_answer=question["sample_answer"],
+        key_points=", ".join(question["key_points"]),
+        answer=user_answer,
+    )
+    return [
+        {"role": "system", "content": EVALUATION_SYSTEM},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _fallback_react_ui_task(ui_type: str, difficulty: str) -> Dict[str, Any]:
+    return {
+        "task_type": ui_type,
+        "title": f"Build a {ui_type.title()} UI",
+        "description": "Create a React component that demonstrates your UI development skills.",
+        "requirements": ["Clean, reusable component structure", "Proper state management", "Responsive design"],
+        "bonus_features": ["Unit tests", "Documentation"],
+        "difficulty": difficulty
+    }
 
-# Set OpenAI API key
-openai.api_key = settings.apikey
 
 class SkillAssessment:
     @staticmethod
-    def generate_questions(skills: List[str], num_questions: int = 5, question_type: str = "mixed") -> List[Dict[str, Any]]:
+    async def generate_questions(skills: List[str], num_questions: int = 5, question_type: str = "mixed") -> List[Dict[str, Any]]:
         """
         Generate skill assessment questions based on the provided skills
         
@@ -22,74 +172,19 @@ class SkillAssessment:
         """
         if not skills:
             return []
-            
-        # Format skills for the prompt
-        skills_text = ", ".join(skills)
-        
-        # Determine question type distribution
-        mcq_count = 0
-        short_answer_count = 0
-        
-        if question_type == "mcq":
-            mcq_count = num_questions
-        elif question_type == "short_answer":
-            short_answer_count = num_questions
-        else:  # mixed
-            mcq_count = num_questions // 2
-            short_answer_count = num_questions - mcq_count
-            
-        # Create the prompt for OpenAI
-        prompt = f"""
-        Generate a skill assessment with {num_questions} questions for a job candidate with the following skills: {skills_text}.
-        
-        Include {mcq_count} multiple-choice questions and {short_answer_count} short answer questions.
-        
-        For multiple-choice questions, provide 4 options with one correct answer.
-        
-        Format the response as a JSON array with the following structure:
-        [
-            {{
-                "question": "Question text",
-                "type": "mcq",
-                "options": ["Option A", "Option B", "Option C", "Option D"],
-                "correct_answer": "The correct option",
-                "explanation": "Explanation of the correct answer"
-            }},
-            {{
-                "question": "Short answer question text",
-                "type": "short_answer",
-                "sample_answer": "A sample correct answer",
-                "key_points": ["Key point 1", "Key point 2", "Key point 3"]
-            }}
-        ]
-        
-        Make sure the questions are challenging but appropriate for a technical interview.
-        """
         
         try:
             # Call OpenAI API
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a technical interviewer creating skill assessment questions."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = await llm.complete(
+                messages=_question_messages(skills, num_questions, question_type),
+                model=settings.llm_question_model,
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=settings.llm_question_max_tokens,
+                operation="generate_questions"
             )
             
-            # Extract and parse the response
-            content = response.choices[0].message.content
-            
-            # Find JSON content (it might be wrapped in markdown code blocks)
-            json_content = content
-            if "```json" in content:
-                json_content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_content = content.split("```")[1].split("```")[0].strip()
-                
             # Parse JSON
-            questions = json.loads(json_content)
+            questions = _parse_json_content(content)
             return questions
             
         except Exception as e:
@@ -97,7 +192,32 @@ class SkillAssessment:
             return []
     
     @staticmethod
-    def generate_react_ui_task(ui_type: str, difficulty: str, features: List[str], description: Optional[str] = None) -> Dict[str, Any]:
+    async def stream_questions(skills: List[str], num_questions: int = 5, question_type: str = "mixed") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Like generate_questions, but yields each question as soon as the
+        streamed completion contains all of it
+        """
+        if not skills:
+            return
+        
+        parser = IncrementalJSONParser()
+        try:
+            async for text in llm.stream(
+                messages=_question_messages(skills, num_questions, question_type),
+                model=settings.llm_question_model,
+                temperature=0.7,
+                max_tokens=settings.llm_question_max_tokens,
+                operation="generate_questions"
+            ):
+                for question in parser.feed(text):
+                    if isinstance(question, dict):
+                        yield question
+                    
+        except Exception as e:
+            print(f"Error streaming questions: {e}")
+    
+    @staticmethod
+    async def generate_react_ui_task(ui_type: str, difficulty: str, features: List[str], description: Optional[str] = None, use_fallback: bool = True) -> Optional[Dict[str, Any]]:
         """
         Generate a dynamic React UI development task based on the provided parameters
         
@@ -106,79 +226,66 @@ class SkillAssessment:
             difficulty: Difficulty level (easy, medium, hard)
             features: List of features to include (e.g., responsive, dark-mode)
             description: Additional description or context
+            use_fallback: Return a generic task if generation fails, otherwise None
             
         Returns:
             Dictionary containing the UI task details
         """
-        # Format features for the prompt
-        features_text = ", ".join(features) if features else "none specified"
-        
-        # Create the prompt for OpenAI
-        prompt = f"""
-        Generate a detailed React UI development task for a {ui_type} with {difficulty} difficulty.
-        
-        The UI should include these features: {features_text}.
-        {f'Additional context: {description}' if description else ''}
-        
-        Format the response as a JSON object with the following structure:
-        {{
-            "task_type": "The type of UI task",
-            "title": "A catchy title for the task",
-            "description": "A detailed description of what to build",
-            "requirements": ["Requirement 1", "Requirement 2", ...],
-            "bonus_features": ["Bonus feature 1", "Bonus feature 2", ...],
-            "difficulty": "{difficulty}"
-        }}
-        
-        Make the task challenging but appropriate for the {difficulty} difficulty level.
-        Be creative and specific with the requirements.
-        """
-        
         try:
             # Call OpenAI API
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a React developer creating UI development tasks."},
-                    {"role": "user", "content": prompt}
-                ],
+            content = await llm.complete(
+                messages=_react_ui_task_messages(ui_type, difficulty, features, description),
+                model=settings.llm_react_ui_task_model,
                 temperature=0.8,
-                max_tokens=1000
+                max_tokens=settings.llm_react_ui_task_max_tokens,
+                operation="generate_react_ui_task"
             )
             
-            # Extract and parse the response
-            content = response.choices[0].message.content
-            
-            # Find JSON content (it might be wrapped in markdown code blocks)
-            json_content = content
-            if "```json" in content:
-                json_content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                json_content = content.split("```")[1].split("```")[0].strip()
-                
             # Parse JSON
-            ui_task = json.loads(json_content)
+            ui_task = _parse_json_content(content)
             return ui_task
             
         except Exception as e:
             print(f"Error generating UI task: {e}")
-            return {
-                "task_type": ui_type,
-                "title": f"Build a {ui_type.title()} UI",
-                "description": "Create a React component that demonstrates your UI development skills.",
-                "requirements": ["Clean, reusable component structure", "Proper state management", "Responsive design"],
-                "bonus_features": ["Unit tests", "Documentation"],
-                "difficulty": difficulty
-            }
+            return _fallback_react_ui_task(ui_type, difficulty) if use_fallback else None
+    
+    @staticmethod
+    async def stream_react_ui_task(ui_type: str, difficulty: str, features: List[str], description: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Like generate_react_ui_task, but yields each (field, value) of the task
+        as soon as it is complete. Fields the completion never delivered are
+        filled in from the fallback task at the end.
+        """
+        parser = IncrementalJSONParser()
+        sent = set()
+        try:
+            async for text in llm.stream(
+                messages=_react_ui_task_messages(ui_type, difficulty, features, description),
+                model=settings.llm_react_ui_task_model,
+                temperature=0.8,
+                max_tokens=settings.llm_react_ui_task_max_tokens,
+                operation="generate_react_ui_task"
+            ):
+                for field, value in parser.feed(text):
+                    sent.add(field)
+                    yield field, value
+                    
+        except Exception as e:
+            print(f"Error streaming UI task: {e}")
+        
+        for field, value in _fallback_react_ui_task(ui_type, difficulty).items():
+            if field not in sent:
+                yield field, value
     
     @staticmethod
-    def evaluate_answer(question: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
+    async def evaluate_answer(question: Dict[str, Any], user_answer: str, local_first: bool = True) -> Dict[str, Any]:
         """
         Evaluate a user's answer to a question
         
         Args:
             question: Question object
             user_answer: User's answer to the question
+            local_first: Return the local grade for clear-cut short answers
             
         Returns:
             Evaluation result
@@ -194,55 +301,47 @@ class SkillAssessment:
                     "explanation": question["explanation"] if "explanation" in question else None
                 }
             else:  # short_answer
-                # For short answers, use OpenAI to evaluate
-                prompt = f"""
-                Question: {question["question"]}
-                
-                Sample correct answer: {question["sample_answer"]}
-                
-                Key points that should be addressed:
-                {", ".join(question["key_points"])}
-                
-                User's answer: {user_answer}
-                
-                Evaluate the user's answer. Consider:
-                1. Does it address the key points?
-                2. Is it technically accurate?
-                3. How complete is the answer?
+                # Clear-cut answers are graded locally, only borderline ones go to OpenAI
+                if local_first:
+                    local_grade = grading.grade_answer(question["key_points"], user_answer)
+                    if local_grade.confident:
+                        return local_grade.evaluation()
                 
-                Return a JSON object with the following format:
-                {{
-                    "score": [A score from 0-10],
-                    "feedback": "Detailed feedback on the answer",
-                    "missing_points": ["Any key points that were missed"],
-                    "is_correct": [true if score >= 7, false otherwise]
-                }}
-                """
+                # Identical answers to the same question are only graded once
+                memo_key = evaluation_cache.cache_key(question, user_answer)
+                cached = await evaluation_cache.get(memo_key)
+                if cached is not None:
+                    return cached
                 
-                response = openai.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a technical interviewer evaluating candidate responses."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=1000
-                )
-                
-                # Extract and parse the response
-                content = response.choices[0].message.content
-                
-                # Find JSON content
-                json_content = content
-                if "```json" in content:
-                    json_content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    json_content = content.split("```")[1].split("```")[0].strip()
+                async def grade():
+                    start = time.perf_counter()
+                    content = await llm.complete(
+                        messages=_evaluation_messages(question, user_answer),
+                        model=settings.llm_evaluation_model,
+                        temperature=0.3,
+                        max_tokens=settings.llm_evaluation_max_tokens,
+                        operation="evaluate_answer",
+                        deadline=settings.openai_evaluation_deadline_seconds
+                    )
+                    metrics.observe("grading.llm_seconds", time.perf_counter() - start)
                     
-                # Parse JSON
-                evaluation = json.loads(json_content)
+                    # Parse JSON
+                    evaluation = _parse_json_content(content)
+                    await evaluation_cache.put(memo_key, evaluation)
+                    return evaluation
+                
+                evaluation, _ = await _grading.do(memo_key, grade)
                 return evaluation
                 
+        except llm.LLMUnavailable as e:
+            # OpenAI is down or too slow: the local grade is better than no grade
+            print(f"Grading locally, OpenAI unavailable: {e}")
+            metrics.increment("grading.llm_fallback")
+            return {
+                **grading.grade_answer(question["key_points"], user_answer).evaluation(),
+                "provisional": True
+            }
+            
         except Exception as e:
             print(f"Error evaluating answer: {e}")
             return {
@@ -251,3 +350,178 @@ class SkillAssessment:
                 "score": 0,
                 "feedback": "There was an error evaluating your answer."
             }
+
+    @staticmethod
+    async def evaluate_answers(
+        pairs: List[Tuple[Dict[str, Any], str]],
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        local_first: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate several answers concurrently
+        
+        Args:
+            pairs: (question, user_answer) tuples
+            concurrency: Maximum evaluations in flight at once
+            timeout: Seconds allowed per evaluation
+            local_first: Passed through to evaluate_answer
+            
+        Returns:
+            Evaluations in the same order as pairs; failed or timed out
+            entries carry an "error" key instead of failing the batch
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.openai_concurrency)
+        timeout = timeout or settings.openai_timeout_seconds
+
+        async def evaluate(question, user_answer):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        SkillAssessment.evaluate_answer(question, user_answer, local_first), timeout
+                    )
+                except asyncio.TimeoutError:
+                    return {
+                        "is_correct": False,
+                        "error": "Evaluation timed out",
+                        "score": 0,
+                        "feedback": "There was an error evaluating your answer."
+                    }
+
+        return await asyncio.gather(*(evaluate(question, answer) for question, answer in pairs))
+
+    @staticmethod
+    def _format_batch_item(item_id: int, question: Dict[str, Any], user_answer: str) -> str:
+        return (
+            f"Item {item_id}\n"
+            f"Question: {question['question']}\n"
+            f"Sample correct answer: {question.get('sample_answer', '')}\n"
+            f"Key points that should be addressed: {', '.join(question.get('key_points') or [])}\n"
+            f"User's answer: {user_answer}\n"
+        )
+
+    @staticmethod
+    async def _evaluate_batch_chunk(items: List[Tuple[int, str]]) -> Dict[int, Dict[str, Any]]:
+        """Grade formatted items in one call, returning evaluations by item id for those that parsed"""
+        prompt = BATCH_EVALUATION_PROMPT.format(items="".join(text for _, text in items).rstrip())
+
+        start = time.perf_counter()
+        content = await llm.complete(
+            messages=[
+                {"role": "system", "content": EVALUATION_SYSTEM},
+                {"role": "user", "content": prompt}
+            ],
+            model=settings.llm_evaluation_model,
+            temperature=0.3,
+            max_tokens=min(settings.llm_evaluation_batch_item_max_tokens * len(items), 4000),
+            operation="evaluate_answers_batch",
+            deadline=settings.openai_evaluation_deadline_seconds
+        )
+        # Every answer in the batch waited for the whole call
+        for _ in items:
+            metrics.observe("grading.llm_seconds", time.perf_counter() - start)
+
+        evaluations = {}
+        parsed = _parse_json_content(content)
+        if not isinstance(parsed, list):
+            return evaluations
+        expected_ids = {item_id for item_id, _ in items}
+        for entry in parsed:
+            if not isinstance(entry, dict):
+                continue
+            item_id = entry.pop("id", None)
+            if item_id in expected_ids and isinstance(entry.get("score"), (int, float)) and "feedback" in entry:
+                entry.setdefault("missing_points", [])
+                entry.setdefault("is_correct", entry["score"] >= 7)
+                evaluations[item_id] = entry
+        return evaluations
+
+    @staticmethod
+    async def evaluate_answers_batch(
+        pairs: List[Tuple[Dict[str, Any], str]],
+        max_prompt_tokens: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate several answers, grading short answers several per LLM call
+        
+        Short answers the local grader is unsure about are packed into
+        prompts of at most max_prompt_tokens estimated tokens; any entry
+        whose batch fails or does not parse is re-graded on its own with
+        evaluate_answer.
+        
+        Args:
+            pairs: (question, user_answer) tuples
+            max_prompt_tokens: Estimated token budget per batch prompt
+            concurrency: Maximum LLM calls in flight at once
+            timeout: Seconds allowed per LLM call
+            
+        Returns:
+            Evaluations in the same order as pairs
+        """
+        max_prompt_tokens = max_prompt_tokens or settings.openai_batch_prompt_tokens
+        results: List[Optional[Dict[str, Any]]] = [None] * len(pairs)
+
+        chunks, chunk, chunk_tokens = [], [], 0
+        for index, (question, user_answer) in enumerate(pairs):
+            if question.get("type") == "mcq":
+                results[index] = await SkillAssessment.evaluate_answer(question, user_answer)
+                continue
+            try:
+                if question.get("type") != "short_answer":
+                    raise ValueError(f"Unknown question type: {question.get('type')!r}")
+                local_grade = grading.grade_answer(question.get("key_points") or [], user_answer)
+                if local_grade.confident:
+                    results[index] = local_grade.evaluation()
+                    continue
+                cached = await evaluation_cache.get(evaluation_cache.cache_key(question, user_answer))
+                if cached is not None:
+                    results[index] = cached
+                    continue
+                text = SkillAssessment._format_batch_item(index, question, user_answer)
+            except Exception as e:
+                # A malformed question fails its own answer, not the whole batch
+                print(f"Error evaluating answer: {e!r}")
+                results[index] = {
+                    "is_correct": False,
+                    "error": str(e),
+                    "score": 0,
+                    "feedback": "There was an error evaluating your answer."
+                }
+                continue
+            tokens = llm.estimate_tokens(text)
+            if chunk and (chunk_tokens + tokens > max_prompt_tokens or len(chunk) >= settings.openai_batch_max_items):
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], 0
+            chunk.append((index, text))
+            chunk_tokens += tokens
+        if chunk:
+            chunks.append(chunk)
+
+        semaphore = asyncio.Semaphore(concurrency or settings.openai_concurrency)
+        timeout = timeout or settings.openai_timeout_seconds
+
+        async def grade(items):
+            async with semaphore:
+                try:
+                    evaluations = await asyncio.wait_for(SkillAssessment._evaluate_batch_chunk(items), timeout)
+                except Exception as e:
+                    print(f"Error evaluating answer batch: {e}")
+                    return
+            for item_id, evaluation in evaluations.items():
+                results[item_id] = evaluation
+                await evaluation_cache.put(evaluation_cache.cache_key(*pairs[item_id]), evaluation)
+
+        await asyncio.gather(*(grade(items) for items in chunks))
+
+        # Fall back to one call per answer for anything the batches did not cover
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            fallback = await SkillAssessment.evaluate_answers(
+                [pairs[index] for index in missing], concurrency=concurrency, timeout=timeout, local_first=False
+            )
+            for index, evaluation in zip(missing, fallback):
+                results[index] = evaluation
+
+        return results
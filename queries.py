@@ -0,0 +1,87 @@
+"""Hot-path queries shared by the routers.
+
+Each query is a ``lambda_stmt`` so SQLAlchemy caches both the statement
+construction and its compiled SQL; only the bound values change per call.
+"""
+from collections import defaultdict
+
+from sqlalchemy import event, lambda_stmt, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+
+import metrics
+from models import Job, Permission, Role, RolePermission, Session, User
+
+
+def get_session(db, session_id):
+    stmt = lambda_stmt(lambda: select(Session).where(Session.id == session_id))
+    return db.scalars(stmt).first()
+
+
+def get_user(db, user_id):
+    stmt = lambda_stmt(lambda: select(User).where(User.id == user_id))
+    return db.scalars(stmt).first()
+
+
+def get_user_by_email(db, email):
+    stmt = lambda_stmt(lambda: select(User).where(User.email == email))
+    return db.scalars(stmt).first()
+
+
+def get_role(db, role_id):
+    stmt = lambda_stmt(lambda: select(Role).where(Role.id == role_id))
+    return db.scalars(stmt).first()
+
+
+def get_role_permissions(db, role_id):
+    """Permission names granted to a role, in one joined query"""
+    stmt = lambda_stmt(
+        lambda: select(Permission.name)
+        .join(RolePermission, RolePermission.permission_id == Permission.id)
+        .where(RolePermission.role_id == role_id)
+    )
+    return list(db.scalars(stmt))
+
+
+def get_permissions_by_role(db):
+    """Permission names for every role, keyed by role id"""
+    stmt = lambda_stmt(
+        lambda: select(RolePermission.role_id, Permission.name)
+        .join(Permission, RolePermission.permission_id == Permission.id)
+    )
+    permissions = defaultdict(list)
+    for role_id, name in db.execute(stmt):
+        permissions[role_id].append(name)
+    return permissions
+
+
+def get_job(db, job_id):
+    stmt = lambda_stmt(lambda: select(Job).where(Job.id == job_id))
+    return db.scalars(stmt).first()
+
+
+def newest_jobs_statement():
+    """Every job, newest first; explain_check plans this same statement"""
+    return select(Job).order_by(Job.created_at.desc())
+
+
+def get_newest_jobs(db):
+    stmt = lambda_stmt(lambda: newest_jobs_statement())
+    return list(db.scalars(stmt))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_statement_cache(conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+        return
+    if context.cache_hit is CACHE_HIT:
+        metrics.increment("statement_cache.hit")
+    elif context.cache_hit is CACHE_MISS:
+        metrics.increment("statement_cache.miss")
+
+
+def statement_cache_stats():
+    counters = metrics.snapshot()["counters"]
+    hits = counters.get("statement_cache.hit", 0)
+    misses = counters.get("statement_cache.miss", 0)
+    return {"hits": hits, "misses": misses, "hit_ratio": metrics.ratio(hits, misses)}
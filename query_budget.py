@@ -0,0 +1,115 @@
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+logger = logging.getLogger(__name__)
+
+_current_stats = contextvars.ContextVar("query_stats", default=None)
+
+_PARAM_LIST = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*\s*\)")
+_PARAM = re.compile(r"%\(\w+\)s")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL statement so repeats with different parameters compare equal"""
+    shape = _PARAM_LIST.sub("(?)", statement)
+    shape = _PARAM.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        self.budget = None
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total_time += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = 2):
+        """Statement shapes executed at least ``threshold`` times, the usual N+1 signature"""
+        return {shape: n for shape, n in self.shapes.most_common() if n >= threshold}
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None and conn.info.get("query_start"):
+        stats.record(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many queries a request may run"""
+
+    def declare_budget():
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = max_queries
+
+    declare_budget.budget = max_queries
+    return declare_budget
+
+
+def route_budgets(app):
+    """Map each route path to its declared query budget"""
+    budgets = {}
+    for route in app.routes:
+        for dependency in getattr(route, "dependencies", []):
+            budget = getattr(dependency.dependency, "budget", None)
+            if budget is not None:
+                budgets[route.path] = budget
+    return budgets
+
+
+@contextmanager
+def track_queries():
+    """Collect query stats for the enclosed block"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryBudgetMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.1f}"
+
+        if stats.over_budget:
+            response.headers["X-DB-Query-Budget-Exceeded"] = f"{stats.count}/{stats.budget}"
+            logger.warning(
+                "%s %s ran %d queries (budget %d), repeated: %s",
+                request.method,
+                request.url.path,
+                stats.count,
+                stats.budget,
+                stats.repeated(),
+            )
+
+        return response
@@ -0,0 +1,195 @@
+"""Persistent bank of generated assessment questions.
+
+Questions are keyed by the normalized skill set and question type. Requests
+are served by sampling from the bank, and only fall through to OpenAI when
+the bank cannot cover them; every generation call refills the bank. Only
+questions assessment_store.valid_question accepts are banked or served.
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List
+
+from sqlalchemy import func, select
+
+import assessment_store
+import llm
+import metrics
+from config import settings
+from database import SessionLocal
+from models import Job, QuestionBankEntry
+from openai_utils import SkillAssessment
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Requests for the same missing key, e.g. candidates opening a newly posted job, share one generation
+_generation = SingleFlight("generate_questions")
+
+
+def skill_key(skills: List[str]) -> str:
+    return "|".join(sorted({skill.strip().lower() for skill in skills if skill.strip()}))
+
+
+def _valid(questions: Any) -> List[Dict[str, Any]]:
+    """The well-formed questions of a generation result, which may be anything"""
+    if not isinstance(questions, list):
+        if questions:
+            logger.warning("Discarding generated questions of type %s", type(questions).__name__)
+        return []
+    valid = [question for question in questions if assessment_store.valid_question(question)]
+    if len(valid) < len(questions):
+        logger.warning("Discarding %d malformed generated questions", len(questions) - len(valid))
+    return valid
+
+
+def _fresh_since() -> datetime:
+    return datetime.utcnow() - timedelta(hours=settings.question_bank_ttl_hours)
+
+
+def _entries(db, key: str, question_type: str):
+    return db.query(QuestionBankEntry).filter(
+        QuestionBankEntry.skill_key == key,
+        QuestionBankEntry.question_type == question_type,
+    )
+
+
+def count_fresh(db, key: str, question_type: str) -> int:
+    return _entries(db, key, question_type).filter(QuestionBankEntry.created_at >= _fresh_since()).count()
+
+
+def sample(db, key: str, question_type: str, num_questions: int, fresh_only: bool = True) -> List[Dict[str, Any]]:
+    """Up to num_questions distinct questions (fresh ones unless told otherwise), in random order"""
+    query = _entries(db, key, question_type).with_entities(QuestionBankEntry.question)
+    if fresh_only:
+        query = query.filter(QuestionBankEntry.created_at >= _fresh_since())
+    rows = query.order_by(func.random()).limit(num_questions).all()
+    # Entries banked before questions were checked may be malformed, they never count
+    return [row.question for row in rows if assessment_store.valid_question(row.question)]
+
+
+def fallback(db, key: str, question_type: str, num_questions: int) -> List[Dict[str, Any]]:
+    """Whatever the bank holds for the key, stale or short, for when generation fails"""
+    questions = sample(db, key, question_type, num_questions, fresh_only=False)
+    if questions:
+        metrics.increment("question_bank.fallback")
+    return questions
+
+
+def add(db, key: str, question_type: str, questions: List[Dict[str, Any]]):
+    db.add_all(
+        QuestionBankEntry(skill_key=key, question_type=question_type, question=question)
+        for question in questions
+    )
+    db.flush()
+
+    # Size-based eviction: keep only the newest entries for this key
+    newest = (
+        select(QuestionBankEntry.id)
+        .where(QuestionBankEntry.skill_key == key, QuestionBankEntry.question_type == question_type)
+        .order_by(QuestionBankEntry.created_at.desc(), QuestionBankEntry.id.desc())
+        .limit(settings.question_bank_max_per_key)
+    )
+    _entries(db, key, question_type).filter(QuestionBankEntry.id.notin_(newest)).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def evict_expired(db):
+    db.query(QuestionBankEntry).filter(QuestionBankEntry.created_at < _fresh_since()).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+
+async def get_questions(db, skills: List[str], num_questions: int, question_type: str) -> List[Dict[str, Any]]:
+    key = skill_key(skills)
+    questions = sample(db, key, question_type, num_questions)
+    if len(questions) >= num_questions:
+        metrics.increment("question_bank.hit")
+        return questions
+
+    metrics.increment("question_bank.miss")
+    questions, shared = await _generation.do(
+        (key, question_type, num_questions),
+        lambda: SkillAssessment.generate_questions(
+            skills=skills, num_questions=num_questions, question_type=question_type
+        ),
+    )
+    questions = _valid(questions)
+    if not questions:
+        return fallback(db, key, question_type, num_questions)
+    if not shared:
+        add(db, key, question_type, questions)
+    return questions
+
+
+async def stream_questions(db, skills: List[str], num_questions: int, question_type: str) -> AsyncIterator[Dict[str, Any]]:
+    """Like get_questions, but yields generated questions as they stream in"""
+    key = skill_key(skills)
+    questions = sample(db, key, question_type, num_questions)
+    if len(questions) >= num_questions:
+        metrics.increment("question_bank.hit")
+        for question in questions:
+            yield question
+        return
+
+    metrics.increment("question_bank.miss")
+    questions = []
+    async for question in SkillAssessment.stream_questions(
+        skills=skills, num_questions=num_questions, question_type=question_type
+    ):
+        if not assessment_store.valid_question(question):
+            logger.warning("Discarding a malformed streamed question")
+            continue
+        questions.append(question)
+        yield question
+    if not questions:
+        for question in fallback(db, key, question_type, num_questions):
+            yield question
+        return
+    add(db, key, question_type, questions)
+
+
+def popular_skill_sets(db, limit: int) -> List[List[str]]:
+    """The skill sets posted on the most jobs"""
+    counts = Counter()
+    skill_sets = {}
+    for (skills,) in db.query(Job.skills).all():
+        key = skill_key(skills or [])
+        if key:
+            counts[key] += 1
+            skill_sets.setdefault(key, skills)
+    return [skill_sets[key] for key, _ in counts.most_common(limit)]
+
+
+async def prewarm(question_type: str = "mixed"):
+    """Top up the bank for the most-posted job skill sets"""
+    db = SessionLocal()
+    try:
+        # Stale questions are the fallback while OpenAI is failing, keep them until it recovers
+        if llm.breaker.state == "closed":
+            evict_expired(db)
+        for skills in popular_skill_sets(db, settings.question_bank_prewarm_top_skill_sets):
+            key = skill_key(skills)
+            while count_fresh(db, key, question_type) < settings.question_bank_target_depth:
+                questions = _valid(await SkillAssessment.generate_questions(
+                    skills=skills, num_questions=10, question_type=question_type
+                ))
+                if not questions:
+                    break
+                add(db, key, question_type, questions)
+    finally:
+        db.close()
+
+
+async def run_prewarmer():
+    """Refresh the bank until cancelled"""
+    while True:
+        try:
+            await prewarm()
+        except Exception as e:
+            logger.exception("Question bank prewarm failed: %s", e)
+        await asyncio.sleep(settings.question_bank_prewarm_interval_seconds)
@@ -0,0 +1,118 @@
+"""Circuit breaker and retry budget for calls to a flaky upstream.
+
+Both are used from the event loop only, so they keep plain state without locks.
+"""
+import random
+import time
+from collections import deque
+from typing import Optional
+
+
+class CircuitBreaker:
+    """Stops calls while most recent ones are failing.
+
+    closed: calls go through and outcomes within ``window_seconds`` are kept.
+    Once at least ``min_calls`` of them failed at ``failure_ratio`` or more
+    the breaker opens and rejects calls for ``open_seconds``. It then lets a
+    single probe through (half open): success closes it, failure reopens it.
+
+    allow() hands out a ticket that the call reports its outcome with. Only
+    the probe's outcome moves an open breaker, and outcomes of calls admitted
+    before the breaker last opened or closed are ignored, so a straggler
+    cannot close a breaker or push its cooldown out.
+    """
+
+    def __init__(self, failure_ratio: float, min_calls: int, window_seconds: float, open_seconds: float):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.times_opened = 0
+        self._outcomes = deque()
+        self._opened_at = None
+        self._probe_started = None
+        self._probe = None
+        self._tickets = 0
+        # Tickets below this were issued before the last open or close
+        self._epoch = 1
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.open_seconds:
+            return "open"
+        return "half_open"
+
+    def _ticket(self) -> int:
+        self._tickets += 1
+        return self._tickets
+
+    def _transition(self, opened_at: Optional[float]):
+        self._opened_at = opened_at
+        self._probe = None
+        self._probe_started = None
+        self._outcomes.clear()
+        self._epoch = self._tickets + 1
+
+    def allow(self) -> Optional[int]:
+        """A ticket to report the call's outcome with, or None if the call must not go through"""
+        state = self.state
+        if state == "closed":
+            return self._ticket()
+        if state == "open":
+            return None
+        # A probe that never reported back (e.g. cancelled) must not wedge the breaker
+        now = time.monotonic()
+        if self._probe_started is None or now - self._probe_started > self.open_seconds:
+            self._probe_started = now
+            self._probe = self._ticket()
+            return self._probe
+        return None
+
+    def record(self, ticket: int, success: bool):
+        if ticket < self._epoch:
+            return
+        now = time.monotonic()
+        if self._opened_at is not None:
+            if ticket != self._probe:
+                return
+            self._transition(None if success else now)
+            return
+
+        self._outcomes.append((now, success))
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+        failures = sum(1 for _, ok in self._outcomes if not ok)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+            self._transition(now)
+            self.times_opened += 1
+
+
+class RetryBudget:
+    """Caps retries at a fraction of first attempts.
+
+    Every call deposits ``ratio`` of a retry and every retry withdraws one,
+    so an outage cannot multiply the load on the upstream. At most
+    ``capacity`` retries are banked, and the budget starts full.
+    """
+
+    def __init__(self, ratio: float, capacity: int):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.balance = float(capacity)
+
+    def deposit(self):
+        self.balance = min(self.balance + self.ratio, float(self.capacity))
+
+    def withdraw(self) -> bool:
+        if self.balance >= 1:
+            self.balance -= 1
+            return True
+        return False
+
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt`` (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -8,11 +8,12 @@ from database import get_db
 from pydantic import BaseModel, EmailStr
 from dependencies import get_user_from_session
 from models import User, Session as SessionModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
-from typing import List
+from typing import List, Literal
 from middleware import permission_required
-from models import Job
+from models import Job, LLMQuota, LLMTokenUsage
+import llm_quota
 
 router = APIRouter(
     prefix="/api/admin",
@@ -32,10 +33,97 @@ class JobPost(BaseModel):
 
 @router.post("/postJob")
 async def post_job(job: JobPost, db: Session = Depends(get_db)):
-    latest_id = db.query(Job).order_by(Job.id.desc()).first()
-    
-    db.add(Job(id=latest_id.id + 1 if latest_id else 1, title=job.title, description=job.description, company_name=job.company_name, location=job.location, salary=job.salary, skills=job.skills, experience=job.experience))
+    db.add(Job(title=job.title, description=job.description, company_name=job.company_name, location=job.location, salary=job.salary, skills=job.skills, experience=job.experience))
     db.commit()
-    return JSONResponse(status_code=201, content={"message": "Job posted successfully"})
-    
+    return ORJSONResponse(status_code=201, content={"message": "Job posted successfully"})
+
+
+class LLMQuotaRequest(BaseModel):
+    tokens_per_hour: int
+    burst_tokens: int
+
+
+def _quota_json(quota: llm_quota.Quota):
+    if quota is None:
+        return None
+    return {"tokens_per_hour": quota.tokens_per_hour, "burst_tokens": quota.burst_tokens}
+
+
+@router.get("/llm-quotas")
+async def list_llm_quotas(
+    user: User = Depends(permission_required("MANAGE_LLM_QUOTA")),
+    db: Session = Depends(get_db),
+):
+    quotas = db.query(LLMQuota).order_by(LLMQuota.scope, LLMQuota.subject).all()
+    return {
+        "defaults": {scope: _quota_json(llm_quota.default_quota(scope)) for scope in llm_quota.SCOPES},
+        "quotas": [
+            {"scope": quota.scope, "subject": quota.subject, "tokens_per_hour": quota.tokens_per_hour, "burst_tokens": quota.burst_tokens}
+            for quota in quotas
+        ],
+    }
+
+
+@router.put("/llm-quotas/{scope}/{subject}")
+async def set_llm_quota(
+    scope: Literal["user", "role", "client"],
+    subject: str,
+    quota: LLMQuotaRequest,
+    user: User = Depends(permission_required("MANAGE_LLM_QUOTA")),
+    db: Session = Depends(get_db),
+):
+    if quota.tokens_per_hour < 0 or quota.burst_tokens < 0:
+        raise HTTPException(status_code=400, detail="Quota values must not be negative")
+
+    existing = db.query(LLMQuota).filter(LLMQuota.scope == scope, LLMQuota.subject == subject).first()
+    if existing is None:
+        db.add(LLMQuota(scope=scope, subject=subject, tokens_per_hour=quota.tokens_per_hour, burst_tokens=quota.burst_tokens))
+    else:
+        existing.tokens_per_hour = quota.tokens_per_hour
+        existing.burst_tokens = quota.burst_tokens
+    db.commit()
+    llm_quota.set_quota(scope, subject, llm_quota.Quota(quota.tokens_per_hour, quota.burst_tokens))
+    return ORJSONResponse(status_code=200, content={"message": "LLM quota updated successfully"})
+
+
+@router.delete("/llm-quotas/{scope}/{subject}")
+async def delete_llm_quota(
+    scope: Literal["user", "role", "client"],
+    subject: str,
+    user: User = Depends(permission_required("MANAGE_LLM_QUOTA")),
+    db: Session = Depends(get_db),
+):
+    deleted = db.query(LLMQuota).filter(LLMQuota.scope == scope, LLMQuota.subject == subject).delete()
+    db.commit()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="LLM quota not found")
+    llm_quota.set_quota(scope, subject, None)
+    return ORJSONResponse(status_code=200, content={"message": "LLM quota removed, the default applies"})
+
+
+@router.get("/llm-quotas/{scope}/{subject}/usage")
+async def get_llm_usage(
+    scope: Literal["user", "role", "client"],
+    subject: str,
+    user: User = Depends(permission_required("MANAGE_LLM_QUOTA")),
+    db: Session = Depends(get_db),
+):
+    daily = {
+        row.day: row.tokens
+        for row in db.query(LLMTokenUsage)
+        .filter(LLMTokenUsage.scope == scope, LLMTokenUsage.subject == subject)
+        .order_by(LLMTokenUsage.day.desc())
+        .limit(30)
+    }
+    for day, tokens in llm_quota.pending_usage(scope, subject).items():
+        daily[day] = daily.get(day, 0) + tokens
+
+    available = llm_quota.available(scope, subject)
+    return {
+        "scope": scope,
+        "subject": subject,
+        "quota": _quota_json(llm_quota.quota_for(scope, subject)),
+        "available_tokens": None if available is None else int(available),
+        "daily_tokens": [{"day": day, "tokens": tokens} for day, tokens in sorted(daily.items(), reverse=True)],
+    }
 
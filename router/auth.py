@@ -7,10 +7,9 @@ from database import get_db
 from pydantic import BaseModel, EmailStr
 from dependencies import get_user_from_session
 from models import User, Session as SessionModel
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import ORJSONResponse, Response
 from datetime import datetime
 from typing import List
-import base64
 import config
 from models import (
     User,
@@ -23,6 +22,8 @@ from models import (
 from cv_processor import CVProcessor
 from uuid import uuid4
 from passlib.context import CryptContext
+from query_budget import query_budget
+import queries
 
 
 
@@ -47,15 +48,15 @@ class LoginRequest(BaseModel):
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(query_budget(6))])
 async def login(request: LoginRequest, db: Session = Depends(get_db)):
     # Check user credentials
-    user = db.query(User).filter(User.email == request.email).first()
+    user = queries.get_user_by_email(db, request.email)
     if user is None:
-        return JSONResponse(status_code=401, content={"message": "Invalid credentials"})
+        return ORJSONResponse(status_code=401, content={"message": "Invalid credentials"})
 
     if not pwd_context.verify(request.password, user.password):
-        return JSONResponse(status_code=401, content={"message": "Invalid credentials"})
+        return ORJSONResponse(status_code=401, content={"message": "Invalid credentials"})
 
     # Check if already logged in
     session = db.query(Session).filter(Session.user_id == user.id).first()
@@ -73,39 +74,26 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     db.commit()
 
     # Fetch role and permissions
-    role = db.query(Role).filter(Role.id == user.role_id).first()
-    role_permissions = (
-        db.query(RolePermission).filter(RolePermission.role_id == role.id).all()
-    )
-    permissions = [
-        db.query(Permission).filter(Permission.id == rp.permission_id).first().name
-        for rp in role_permissions
-    ]
+    role = queries.get_role(db, user.role_id)
+    permissions = queries.get_role_permissions(db, role.id)
 
     # No room data needed
 
-    # Encode CV as base64 if it exists
-    cv_base64 = None
-    cv_summary = None
     cv_key_info = None
     
-    if user.cv:
-        cv_base64 = base64.b64encode(user.cv).decode('utf-8')
-        
-        # Process the CV to get summary and key info
+    if user.cv_hash:
+        # Process the CV to get key info
         try:
-            processor = CVProcessor()
-            cv_text = processor.extract_text_from_pdf(user.cv)
+            analysis = await CVProcessor.analyze(user.cv_hash, summary=False)
             
-            if cv_text:
-                cv_summary = processor.generate_summary(cv_text)
-                cv_key_info = processor.extract_key_info(cv_text)
+            if analysis:
+                cv_key_info = analysis["key_info"]
         except Exception as e:
             print(f"Error processing CV: {e}")
             # Continue without summary if there's an error
     
     # Craft response
-    response = JSONResponse(
+    response = ORJSONResponse(
         status_code=200,
         content={
             "id": user.id,
@@ -117,10 +105,11 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
             "company_name": user.company_name,
             "job_title": user.job_title,
             "message": user.message,
-            "has_cv": user.cv is not None,
-            # "cv_summary": cv_summary,  # Include CV summary if available
+            "has_cv": user.cv_hash is not None,
+            "cv_url": utils.cvUrl(user),
+            "cv_hash": user.cv_hash,
             "cv_key_info": cv_key_info,  # Include key info extracted from CV
-            "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else None,
+            "created_at": user.created_at,
         },
     )
 
@@ -128,33 +117,26 @@ async def login(request: LoginRequest, db: Session = Depends(get_db)):
     return response
 
 
-@router.get("/me")
+@router.get("/me", dependencies=[Depends(query_budget(6))])
 async def get_profile(user: User = Depends(get_user_from_session), db: Session = Depends(get_db)):
     # If user is a dictionary (from the session), fetch the complete user object
     if isinstance(user, dict):
-        user = db.query(User).filter(User.id == user["id"]).first()
+        user = queries.get_user(db, user["id"])
 
-    # Encode CV as base64 if it exists
-    cv_base64 = None
-    cv_summary = None
     cv_key_info = None
     
-    if user.cv:
-        cv_base64 = base64.b64encode(user.cv).decode('utf-8')
-        
-        # Process the CV to get summary and key info
+    if user.cv_hash:
+        # Process the CV to get key info
         try:
-            processor = CVProcessor()
-            cv_text = processor.extract_text_from_pdf(user.cv)
+            analysis = await CVProcessor.analyze(user.cv_hash, summary=False)
             
-            if cv_text:
-                cv_summary = processor.generate_summary(cv_text)
-                cv_key_info = processor.extract_key_info(cv_text)
+            if analysis:
+                cv_key_info = analysis["key_info"]
         except Exception as e:
             print(f"Error processing CV in get_profile: {e}")
             # Continue without summary if there's an error
     
-    # Create a response that includes all user fields with CV as base64
+    # Create a response that includes all user fields, the CV itself is linked
     user_data = {
         "id": user.id,
         "name": user.name,
@@ -164,10 +146,11 @@ async def get_profile(user: User = Depends(get_user_from_session), db: Session =
         "company_name": user.company_name,
         "job_title": user.job_title,
         "message": user.message,
-        "has_cv": user.cv is not None,
-        # "cv_summary": cv_summary,  # Include CV summary if available
+        "has_cv": user.cv_hash is not None,
+        "cv_url": utils.cvUrl(user),
+        "cv_hash": user.cv_hash,
         "cv_key_info": cv_key_info,  # Include key info extracted from CV
-        "created_at": user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else None,
+        "created_at": user.created_at,
     }
     
     return user_data
@@ -181,7 +164,7 @@ async def logout(
     db.delete(session)
     db.commit()
 
-    response = JSONResponse(status_code=200, content={"message": "Logged out"})
+    response = ORJSONResponse(status_code=200, content={"message": "Logged out"})
     response.delete_cookie("SESSION")
 
     return response
@@ -198,16 +181,15 @@ async def change_password(
     user: User = Depends(get_user_from_session),
     db: Session = Depends(get_db),
 ):
-    user = db.query(User).filter(User.id == user["id"]).first()
+    user = queries.get_user(db, user["id"])
     if not pwd_context.verify(request.old_password, user.password):
-        return JSONResponse(status_code=401, content={"message": "Invalid credentials"})
+        return ORJSONResponse(status_code=401, content={"message": "Invalid credentials"})
 
     user.password = pwd_context.hash(request.new_password)
+    utils.queueEmail(db, "Password changed", "Your password has been changed", user.email)
     db.commit()
 
-    utils.sendEmail("Password changed", "Your password has been changed", user.email)
-
-    return JSONResponse(status_code=200, content={"message": "Password changed"})
+    return ORJSONResponse(status_code=200, content={"message": "Password changed"})
 
 
 class ForgotPasswordRequest(BaseModel):
@@ -218,9 +200,9 @@ class ForgotPasswordRequest(BaseModel):
 async def forgot_password(
     request: ForgotPasswordRequest, db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == request.email).first()
+    user = queries.get_user_by_email(db, request.email)
     if user is None:
-        return JSONResponse(status_code=400, content={"message": "Invalid email"})
+        return ORJSONResponse(status_code=400, content={"message": "Invalid email"})
 
     token = str(uuid4().int)[:4]
     forgot_password = ForgotPassword(
@@ -229,11 +211,10 @@ async def forgot_password(
         expires=datetime.now().timestamp() + 60 * 60,  # 1 hour
     )
     db.add(forgot_password)
+    utils.queueEmail(db, "Forgot password", f"Your token is {token}", user.email)
     db.commit()
 
-    utils.sendEmail("Forgot password", f"Your token is {token}", user.email)
-
-    return JSONResponse(status_code=200, content={"message": "Otp sent"})
+    return ORJSONResponse(status_code=200, content={"message": "Otp sent"})
 
 
 class ResetPasswordRequest(BaseModel):
@@ -247,15 +228,15 @@ async def reset_password(request: ResetPasswordRequest, db: Session = Depends(ge
         db.query(ForgotPassword).filter(ForgotPassword.token == request.token).first()
     )
     if forgot_password is None:
-        return JSONResponse(status_code=400, content={"message": "Invalid Otp"})
+        return ORJSONResponse(status_code=400, content={"message": "Invalid Otp"})
 
     if forgot_password.expires < datetime.now().timestamp():
-        return JSONResponse(status_code=400, content={"message": "Otp expired"})
+        return ORJSONResponse(status_code=400, content={"message": "Otp expired"})
 
-    user = db.query(User).filter(User.id == forgot_password.user_id).first()
+    user = queries.get_user(db, forgot_password.user_id)
     user.password = pwd_context.hash(request.new_password)
     db.delete(forgot_password)
     db.commit()
 
-    return JSONResponse(status_code=200, content={"message": "Password reset"})
+    return ORJSONResponse(status_code=200, content={"message": "Password reset"})
 
@@ -1,22 +1,32 @@
 
 import database
 from fastapi import Depends, HTTPException, APIRouter, UploadFile, File, Form
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException, status
 from database import get_db
 from pydantic import BaseModel, EmailStr, Field
-from dependencies import get_user_from_session
+from dependencies import get_user_from_session, get_optional_user_from_session
 from models import User, Session as SessionModel, Job
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from middleware import permission_required
 from cv_processor import CVProcessor
 from openai_utils import SkillAssessment
+import question_bank
+import assessment_store
+import ui_task_catalog
 import re
-import json
+import orjson
+import time
+import metrics
+import llm_usage
 from fastapi import Query
+from query_budget import query_budget
+from llm_quota import require_llm_quota
+from singleflight import SingleFlight
+import queries
 
 router = APIRouter(
     prefix="/api/jobseeker",
@@ -48,32 +58,41 @@ class CurrentUserID(BaseModel):
 
 
 
-@router.get("/matchJob/{user_id}", response_model=List[JobMatchResponse])
+# A refreshing client repeats matchJob while its previous call is still running
+_matching = SingleFlight("match_job")
+_ui_task_generation = SingleFlight("generate_react_ui_task")
+
+
+@router.get("/matchJob/{user_id}", response_model=List[JobMatchResponse], dependencies=[Depends(query_budget(2))])
 async def match_job(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(database.get_read_db)
 ):  
     """Match jobs with user's skills extracted from their CV"""
+    job_matches, _ = await _matching.do(user_id, lambda: _match_jobs(db, user_id))
+    return job_matches
+
+
+async def _match_jobs(db: Session, user_id: int) -> List[Dict[str, Any]]:
     # Get the current user from the database
-    user = db.query(User).filter(User.id ==     user_id).first()
+    user = queries.get_user(db, user_id)
         
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if user has uploaded a CV
-    if not user.cv:
+    if not user.cv_hash:
         raise HTTPException(status_code=400, detail="You need to upload your CV first to match jobs")
     
     # Process the CV to extract skills
-    processor = CVProcessor()
-    cv_text = processor.extract_text_from_pdf(user.cv)
+    analysis = await CVProcessor.analyze(user.cv_hash, summary=False)
     
-    if not cv_text:
+    if not analysis:
         raise HTTPException(status_code=400, detail="Could not extract text from your CV")
     
     # Extract key information including skills
-    key_info = processor.extract_key_info(cv_text)
-    user_skills = key_info.get('skills', [])
+    cv_text = analysis["text"]
+    user_skills = list(analysis["key_info"].get('skills', []))
     
     # If no skills found, try to extract skills from the full text
     if not user_skills:
@@ -151,10 +170,10 @@ async def match_job(
     return job_matches
 
 
-@router.get("/jobs", response_model=List[Dict[str, Any]])
-async def get_all_jobs(db: Session = Depends(get_db)):
+@router.get("/jobs", response_model=List[Dict[str, Any]], dependencies=[Depends(query_budget(1))])
+async def get_all_jobs(db: Session = Depends(database.get_read_db)):
     """Get all available jobs"""
-    jobs = db.query(Job).all()
+    jobs = queries.get_newest_jobs(db)
     
     result = []
     for job in jobs:
@@ -166,7 +185,7 @@ async def get_all_jobs(db: Session = Depends(get_db)):
             "salary": job.salary,
             "skills": job.skills,
             "experience": job.experience,
-            "created_at": job.created_at.isoformat() if job.created_at else None
+            "created_at": job.created_at
         })
     
     return result
@@ -178,7 +197,7 @@ class JobId(BaseModel):
 @router.post("/jobs", response_model=Dict[str, Any])
 async def get_job(job_id: JobId, db: Session = Depends(get_db)):
     """Get a specific job by ID"""
-    job = db.query(Job).filter(Job.id == job_id.job_id).first()
+    job = queries.get_job(db, job_id.job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -192,7 +211,7 @@ async def get_job(job_id: JobId, db: Session = Depends(get_db)):
         "salary": job.salary,
         "skills": job.skills,
         "experience": job.experience,
-        "created_at": job.created_at.isoformat() if job.created_at else None
+        "created_at": job.created_at
     }
 
 
@@ -209,21 +228,45 @@ class ReactUIRequest(BaseModel):
     description: Optional[str] = Field(None, description="Additional description of what the UI should do")
 
 
+class QuestionAnswer(BaseModel):
+    question_id: str
+    answer: str
+
+
 class ReactExamSubmission(BaseModel):
     exam_id: str
-    answers: List[Dict[str, Any]]
+    answers: List[QuestionAnswer]
 
 
-@router.get("/generate-assessment")
-async def generate_assessment(
-    skills: Optional[List[str]] = Query(None),
-    job_id: Optional[int] = None,
-    num_questions: Optional[int] = Query(5, ge=1, le=10),
-    question_type: Optional[str] = Query("mixed"),
-    db: Session = Depends(get_db)
-):
+def get_exam_questions(
+    db: Session, exam_id: str, question_ids: List[str], complete: bool = True
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Stored questions for the submitted ids, including their rubric, and how many the exam has
 
+    Each id may be submitted once; with complete, every question of the exam
+    must be answered.
+    """
+    exam = assessment_store.get_exam(db, exam_id)
+    if exam is None:
+        raise HTTPException(status_code=404, detail="Exam not found or expired")
+    
+    for question_id in question_ids:
+        if question_id not in exam:
+            raise HTTPException(status_code=404, detail=f"Question {question_id} not found in exam")
+    
+    duplicates = sorted({question_id for question_id in question_ids if question_ids.count(question_id) > 1})
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Questions answered more than once: {', '.join(duplicates)}")
     
+    unanswered = [question_id for question_id in exam if question_id not in question_ids]
+    if complete and unanswered:
+        raise HTTPException(status_code=400, detail=f"Questions not answered: {', '.join(unanswered)}")
+    
+    return [exam[question_id] for question_id in question_ids], len(exam)
+
+
+async def resolve_skills(db: Session, skills: Optional[List[str]], job_id: Optional[int], user_id: Optional[int]) -> List[str]:
+    """Skills to assess: given directly, taken from a job, or extracted from the user's CV"""
     skills_to_assess = []
     
     # If skills are provided directly, use those
@@ -232,26 +275,26 @@ async def generate_assessment(
     
     # If job_id is provided, get skills from the job
     elif job_id is not None:
-        job = db.query(Job).filter(Job.id == job_id).first()
+        job = queries.get_job(db, job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         skills_to_assess = job.skills
     
     # If neither skills nor job_id is provided, extract skills from user's CV
     else:
-        if not user.cv:
+        user = queries.get_user(db, user_id) if user_id is not None else None
+        if not user or not user.cv_hash:
             raise HTTPException(status_code=400, detail="You need to upload your CV or specify skills to assess")
         
         # Process the CV to extract skills
-        processor = CVProcessor()
-        cv_text = processor.extract_text_from_pdf(user.cv)
+        analysis = await CVProcessor.analyze(user.cv_hash, summary=False)
         
-        if not cv_text:
+        if not analysis:
             raise HTTPException(status_code=400, detail="Could not extract text from your CV")
         
         # Extract key information including skills
-        key_info = processor.extract_key_info(cv_text)
-        user_skills = key_info.get('skills', [])
+        cv_text = analysis["text"]
+        user_skills = list(analysis["key_info"].get('skills', []))
         
         # If no skills found, try to extract skills from the full text
         if not user_skills:
@@ -278,68 +321,144 @@ async def generate_assessment(
     if not skills_to_assess:
         raise HTTPException(status_code=400, detail="No skills found to assess")
     
-    # Generate questions using OpenAI
-    questions = SkillAssessment.generate_questions(
+    return skills_to_assess
+
+
+@router.get("/generate-assessment", dependencies=[Depends(require_llm_quota)])
+async def generate_assessment(
+    skills: Optional[List[str]] = Query(None),
+    job_id: Optional[int] = None,
+    num_questions: Optional[int] = Query(5, ge=1, le=10),
+    question_type: Optional[str] = Query("mixed"),
+    current_user: Optional[dict] = Depends(get_optional_user_from_session),
+    db: Session = Depends(get_db)
+):
+    # Only the caller's own CV is ever used
+    user_id = current_user["id"] if current_user else None
+    skills_to_assess = await resolve_skills(db, skills, job_id, user_id)
+    
+    # Serve from the question bank, generating with OpenAI only when it runs short
+    questions = await question_bank.get_questions(
+        db,
         skills=skills_to_assess,
         num_questions=num_questions,
         question_type=question_type
     )
     
+    if not questions:
+        raise HTTPException(status_code=500, detail="Failed to generate assessment questions")
+    
+    # Keep the rubric server-side; answers are submitted against the exam id
+    exam_id, questions = assessment_store.create_exam(db, questions)
     if not questions:
         raise HTTPException(status_code=500, detail="Failed to generate assessment questions")
     
     return {
+        "exam_id": exam_id,
         "skills_assessed": skills_to_assess,
-        "questions": questions
+        "questions": [assessment_store.public_question(question) for question in questions]
     }
 
 
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/generate-assessment/stream", dependencies=[Depends(require_llm_quota)])
+async def stream_assessment(
+    skills: Optional[List[str]] = Query(None),
+    job_id: Optional[int] = None,
+    num_questions: Optional[int] = Query(5, ge=1, le=10),
+    question_type: Optional[str] = Query("mixed"),
+    current_user: Optional[dict] = Depends(get_optional_user_from_session),
+    db: Session = Depends(get_db)
+):
+    """
+    generate-assessment over Server-Sent Events: an `exam` event with the
+    exam id, a `question` event per question as soon as it is generated,
+    then `done` once the exam is stored and answers can be submitted
+    """
+    # Only the caller's own CV is ever used
+    user_id = current_user["id"] if current_user else None
+    skills_to_assess = await resolve_skills(db, skills, job_id, user_id)
+    exam_id = assessment_store.new_exam_id()
+    
+    async def events():
+        # The request's session is released before the body streams
+        stream_db = database.SessionLocal()
+        try:
+            started = time.monotonic()
+            yield sse_event("exam", {"exam_id": exam_id, "skills_assessed": skills_to_assess})
+            
+            questions = []
+            async for question in question_bank.stream_questions(
+                stream_db,
+                skills=skills_to_assess,
+                num_questions=num_questions,
+                question_type=question_type
+            ):
+                # Numbering must match what create_exam stores, so malformed questions are skipped here
+                if not assessment_store.valid_question(question):
+                    continue
+                questions.append(question)
+                if len(questions) == 1:
+                    metrics.observe("assessment_stream.first_question_seconds", time.monotonic() - started)
+                numbered = {**question, "id": assessment_store.question_id(len(questions))}
+                yield sse_event("question", assessment_store.public_question(numbered))
+            
+            if not questions:
+                yield sse_event("error", {"detail": "Failed to generate assessment questions"})
+                return
+            
+            assessment_store.create_exam(stream_db, questions, exam_id=exam_id)
+            metrics.observe("assessment_stream.total_seconds", time.monotonic() - started)
+            yield sse_event("done", {"exam_id": exam_id, "num_questions": len(questions)})
+        finally:
+            stream_db.close()
+    
+    return sse_response(events())
+
+
 class AnswerSubmission(BaseModel):
-    question: Dict[str, Any]
+    exam_id: str
+    question_id: str
     answer: str
 
 
-@router.post("/evaluate-answer")
+@router.post("/evaluate-answer", dependencies=[Depends(require_llm_quota)])
 async def evaluate_answer(
     submission: AnswerSubmission,
     db: Session = Depends(get_db)
 ):
     """Evaluate a user's answer to an assessment question"""
-    # Get the current user from the database
-    if isinstance(current_user, dict):
-        user = db.query(User).filter(User.id == current_user["id"]).first()
-    else:
-        user = current_user
-        
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Validate the question format
-    required_fields = ["question", "type"]
-    if submission.question["type"] == "mcq":
-        required_fields.extend(["options", "correct_answer"])
-    elif submission.question["type"] == "short_answer":
-        required_fields.extend(["sample_answer", "key_points"])
-    
-    for field in required_fields:
-        if field not in submission.question:
-            raise HTTPException(status_code=400, detail=f"Question is missing required field: {field}")
+    (question,), _ = get_exam_questions(db, submission.exam_id, [submission.question_id], complete=False)
     
     # Evaluate the answer
-    evaluation = SkillAssessment.evaluate_answer(submission.question, submission.answer)
+    evaluation = await SkillAssessment.evaluate_answer(question, submission.answer)
     
     return {
-        "question": submission.question["question"],
+        "question_id": submission.question_id,
+        "question": question["question"],
         "user_answer": submission.answer,
         "evaluation": evaluation
     }
 
 
 class BatchAnswerSubmission(BaseModel):
-    questions_and_answers: List[AnswerSubmission]
+    exam_id: str
+    answers: List[QuestionAnswer]
 
 
-@router.post("/react-ui-task")
+@router.post("/react-ui-task", dependencies=[Depends(require_llm_quota)])
 async def get_react_ui_task(
     request: ReactUIRequest,
     db: Session = Depends(get_db)
@@ -350,13 +469,20 @@ async def get_react_ui_task(
     # Set task difficulty
     difficulty_level = request.difficulty.lower()
     
+    # Stock combinations are served from the pregenerated catalog
+    ui_task = None
+    if not request.description:
+        ui_task = ui_task_catalog.take(db, request.ui_type, difficulty_level, request.features)
+    
     # Generate a dynamic UI task using OpenAI
-    ui_task = SkillAssessment.generate_react_ui_task(
-        ui_type=request.ui_type,
-        difficulty=difficulty_level,
-        features=request.features,
-        description=request.description
-    )
+    if ui_task is None:
+        key = (ui_task_catalog.catalog_key(request.ui_type, difficulty_level, request.features), (request.description or "").strip())
+        ui_task, _ = await _ui_task_generation.do(key, lambda: SkillAssessment.generate_react_ui_task(
+            ui_type=request.ui_type,
+            difficulty=difficulty_level,
+            features=request.features,
+            description=request.description
+        ))
     
     # Generate a unique task ID
     task_id = f"react-ui-{datetime.now().timestamp()}"    
@@ -369,7 +495,51 @@ async def get_react_ui_task(
     }
 
 
-@router.post("/evaluate-react-exam")
+@router.post("/react-ui-task/stream", dependencies=[Depends(require_llm_quota)])
+async def stream_react_ui_task(request: ReactUIRequest, db: Session = Depends(get_db)):
+    """
+    react-ui-task over Server-Sent Events: a `field` event per task field as
+    soon as it is generated, then `done` with the complete response
+    """
+    difficulty_level = request.difficulty.lower()
+    task_id = f"react-ui-{datetime.now().timestamp()}"
+    
+    # A catalog task is complete already and goes out in one burst
+    catalog_task = None
+    if not request.description:
+        catalog_task = ui_task_catalog.take(db, request.ui_type, difficulty_level, request.features)
+    
+    async def fields():
+        if catalog_task is not None:
+            for field in catalog_task.items():
+                yield field
+            return
+        async for field in SkillAssessment.stream_react_ui_task(
+            ui_type=request.ui_type,
+            difficulty=difficulty_level,
+            features=request.features,
+            description=request.description
+        ):
+            yield field
+    
+    async def events():
+        ui_task = {}
+        async for field, value in fields():
+            ui_task[field] = value
+            yield sse_event("field", {"field": field, "value": value})
+        
+        yield sse_event("done", {
+            "task_id": task_id,
+            "ui_type": request.ui_type,
+            "difficulty": difficulty_level,
+            "task": ui_task,
+            "submission_instructions": "Create a React application implementing this UI. Submit a GitHub repository link with your solution."
+        })
+    
+    return sse_response(events())
+
+
+@router.post("/evaluate-react-exam", dependencies=[Depends(require_llm_quota)])
 async def evaluate_react_exam(
     submission: ReactExamSubmission,
     current_user: CurrentUserID,
@@ -377,48 +547,56 @@ async def evaluate_react_exam(
 ):
     """Evaluate a React frontend exam submission"""
     # Get the user from the database
-    user = db.query(User).filter(User.id == current_user.user_id).first()
+    user = queries.get_user(db, current_user.user_id)
+    llm_usage.set_user(current_user.user_id)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    questions, exam_size = get_exam_questions(db, submission.exam_id, [answer.question_id for answer in submission.answers])
+    
     results = []
     total_score = 0
-    max_possible_score = len(submission.answers) * 10  # Each question is worth 10 points
+    max_possible_score = exam_size * 10  # Each question is worth 10 points
+    
+    # Short answers are graded locally, only borderline ones are escalated to OpenAI
+    short_answer_evaluations = iter(await SkillAssessment.evaluate_answers_batch([
+        (question, answer.answer)
+        for answer, question in zip(submission.answers, questions)
+        if question["type"] != "mcq"
+    ]))
     
-    for answer in submission.answers:
+    for answer, question in zip(submission.answers, questions):
         # Evaluate the answer based on its type
-        if answer.get("type") == "mcq":
+        if question["type"] == "mcq":
             # For MCQs, check if the answer matches exactly
-            is_correct = answer.get("user_answer", "") == answer.get("correct_answer", "")
+            is_correct = answer.answer == question["correct_answer"]
             score = 10 if is_correct else 0
             
             results.append({
-                "question": answer.get("question"),
-                "user_answer": answer.get("user_answer"),
-                "correct_answer": answer.get("correct_answer"),
+                "question_id": answer.question_id,
+                "question": question["question"],
+                "user_answer": answer.answer,
+                "correct_answer": question["correct_answer"],
                 "score": score,
-                "feedback": "Correct!" if is_correct else "Incorrect. The correct answer is: " + answer.get("correct_answer", "")
+                "feedback": "Correct!" if is_correct else "Incorrect. The correct answer is: " + question["correct_answer"]
             })
             
             total_score += score
         else:  # short_answer
-            # For short answers, check for key points
-            user_answer = answer.get("user_answer", "").lower()
-            key_points = answer.get("key_points", [])
-            matched_points = [point for point in key_points if point.lower() in user_answer]
-            
-            # Calculate score based on percentage of key points covered
-            point_score = len(matched_points) / len(key_points) if key_points else 0
-            score = round(point_score * 10)
+            key_points = question["key_points"]
+            evaluation = next(short_answer_evaluations)
+            score = round(evaluation.get("score", 0))
+            missed_points = evaluation.get("missing_points", [])
             
             results.append({
-                "question": answer.get("question"),
-                "user_answer": answer.get("user_answer"),
+                "question_id": answer.question_id,
+                "question": question["question"],
+                "user_answer": answer.answer,
                 "score": score,
-                "feedback": f"You covered {len(matched_points)} out of {len(key_points)} key points.",
-                "key_points_covered": matched_points,
-                "key_points_missed": [point for point in key_points if point.lower() not in user_answer]
+                "feedback": evaluation.get("feedback"),
+                "key_points_covered": [point for point in key_points if point not in missed_points],
+                "key_points_missed": missed_points
             })
             
             total_score += score
@@ -439,56 +617,56 @@ async def evaluate_react_exam(
     }
 
 
-@router.post("/evaluate-assessment")
+@router.post("/evaluate-assessment", dependencies=[Depends(require_llm_quota)])
 async def evaluate_assessment(
     submission: BatchAnswerSubmission,
     db: Session = Depends(get_db)
 ):
     """Evaluate all answers in a skill assessment"""
-    # Get the current user from the database
-    if isinstance(current_user, dict):
-        user = db.query(User).filter(User.id == current_user["id"]).first()
-    else:
-        user = current_user
-        
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    questions, exam_size = get_exam_questions(db, submission.exam_id, [answer.question_id for answer in submission.answers])
     
     results = []
     total_score = 0
-    max_possible_score = 0
+    max_possible_score = exam_size * 10  # Each question is worth 10 points
+    failed_evaluations = 0
+    
+    # Grade short answers in batches; failed evaluations come back with an error
+    evaluations = await SkillAssessment.evaluate_answers_batch(
+        [(question, answer.answer) for answer, question in zip(submission.answers, questions)]
+    )
     
-    for qa_pair in submission.questions_and_answers:
-        # Evaluate each answer
-        evaluation = SkillAssessment.evaluate_answer(qa_pair.question, qa_pair.answer)
+    for answer, question, evaluation in zip(submission.answers, questions, evaluations):
+        if "error" in evaluation:
+            failed_evaluations += 1
         
         result = {
-            "question": qa_pair.question["question"],
-            "user_answer": qa_pair.answer,
+            "question_id": answer.question_id,
+            "question": question["question"],
+            "user_answer": answer.answer,
             "evaluation": evaluation
         }
         
         results.append(result)
         
         # Calculate scores for summary
-        if qa_pair.question["type"] == "mcq":
-            max_possible_score += 10
+        if question["type"] == "mcq":
             if evaluation.get("is_correct", False):
                 total_score += 10
         else:  # short_answer
-            max_possible_score += 10
             total_score += evaluation.get("score", 0)
     
     # Calculate overall percentage
     percentage = (total_score / max_possible_score * 100) if max_possible_score > 0 else 0
     
     return {
+        "exam_id": submission.exam_id,
         "results": results,
         "summary": {
             "total_score": total_score,
             "max_possible_score": max_possible_score,
             "percentage": round(percentage, 2),
-            "pass": percentage >= 70  # Consider 70% as passing score
+            "pass": percentage >= 70,  # Consider 70% as passing score
+            "failed_evaluations": failed_evaluations
         }
     }
     
\ No newline at end of file
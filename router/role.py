@@ -2,10 +2,13 @@ from models import Role, User, RolePermission, Permission
 import database
 from fastapi import Depends, APIRouter
 from pydantic import BaseModel
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from typing import List
 from middleware import permission_required
+from query_budget import query_budget
+import queries
 
 router = APIRouter(
     prefix="/api/rbac",
@@ -24,10 +27,9 @@ async def create_role(
     user: User = Depends(permission_required("CREATE_ROLE")),
     db: Session = Depends(database.get_db),
 ):
-    latest_id = db.query(Role).order_by(Role.id.desc()).first()
-    db.add(Role(id=latest_id.id + 1, name=role.name))
+    db.add(Role(name=role.name))
     db.commit()
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=201, content={"message": "Role created successfully"}
     )
 
@@ -41,7 +43,7 @@ async def update_role(
 ):
     db.query(Role).filter(Role.id == role_id).update({"name": role.name})
     db.commit()
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200, content={"message": "Role updated successfully"}
     )
 
@@ -61,7 +63,7 @@ async def delete_role(
     db.query(User).filter(User.role_id == role_id).update({"role_id": 0})
     db.query(Role).filter(Role.id == role_id).delete()
     db.commit()
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200, content={"message": "Role deleted successfully"}
     )
 
@@ -77,15 +79,9 @@ async def create_permission(
     user: User = Depends(permission_required("CREATE_PERMISSION")),
     db: Session = Depends(database.get_db),
 ):
-    latest_id = db.query(Permission).order_by(Permission.id.desc()).first()
-
-    db.add(
-        Permission(
-            id=latest_id.id + 1, name=permission.name, category=permission.category
-        )
-    )
+    db.add(Permission(name=permission.name, category=permission.category))
     db.commit()
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=201, content={"message": "Permission created successfully"}
     )
 
@@ -113,51 +109,34 @@ async def edit_role_permissions(
         .filter(Permission.id.in_(role_permissions.permissions))\
         .all()
 
-    max_id = db.query(RolePermission.id).order_by(RolePermission.id.desc()).first()
-    next_id = max_id.id + 1 if max_id else 1
-
-    new_permissions = []
-    for permission_id in role_permissions.permissions:
-        if permission_id not in already_assigned_ids:
-            new_permissions.append(
-                RolePermission(
-                    id=next_id,
-                    role_id=role_permissions.role_id,
-                    permission_id=permission_id,
-                )
-            )
-            next_id += 1
+    new_permissions = [
+        {"role_id": role_permissions.role_id, "permission_id": permission_id}
+        for permission_id in role_permissions.permissions
+        if permission_id not in already_assigned_ids
+    ]
 
     if new_permissions:
-        db.bulk_save_objects(new_permissions)
+        db.execute(insert(RolePermission), new_permissions)
         db.commit()
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200, content={"message": "Role permissions updated successfully"}
     )
 
 
-@router.get("/listAllRoles")
+@router.get("/listAllRoles", dependencies=[Depends(query_budget(8))])
 async def get_roles(
     user: User = Depends(permission_required("LIST_ALL_ROLES")),
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(database.get_read_db),
 ):
     roles = db.query(Role).all()
+    permissions_by_role = queries.get_permissions_by_role(db)
     response = []
     for role in roles:
-        role_permissions = (
-            db.query(RolePermission).filter(RolePermission.role_id == role.id).all()
-        )
-        permissions = []
-        for rp in role_permissions:
-            permission = (
-                db.query(Permission).filter(Permission.id == rp.permission_id).first()
-            )
-            permissions.append(permission.name)
-
+        permissions = permissions_by_role.get(role.id, [])
         response.append({"id": role.id, "name": role.name, "permissions": permissions})
 
-    return JSONResponse(status_code=200, content=response)
+    return ORJSONResponse(status_code=200, content=response)
 
 
 @router.get("/listAllPermissions")
@@ -188,4 +167,4 @@ async def list_permissions(
             {"category": category, "permissions": category_permission}
         )
 
-    return JSONResponse(status_code=200, content=category_response)
+    return ORJSONResponse(status_code=200, content=category_response)
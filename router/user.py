@@ -1,20 +1,25 @@
 import utils
 import database
-from fastapi import Depends, HTTPException, APIRouter, UploadFile, File, Form
-from fastapi.responses import Response
+from fastapi import Depends, HTTPException, APIRouter, UploadFile, File, Form, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, HTTPException, status
 from database import get_db
 from pydantic import BaseModel, EmailStr
 from dependencies import get_user_from_session
 from models import User, Session as SessionModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 from middleware import permission_required
 from models import Role, RolePermission, Permission
 from cv_processor import CVProcessor
-import base64
+import asyncio
+import re
+import blob_store
+from config import settings
+from query_budget import query_budget
+import queries
 
 
 router = APIRouter(
@@ -44,43 +49,21 @@ class SignupRequest(BaseModel):
     message: str = None
 
 
-@router.get("/allUsers")
+@router.get("/allUsers", dependencies=[Depends(query_budget(3))])
 async def all_users(
     
-    db: Session = Depends(get_db),
+    db: Session = Depends(database.get_read_db),
 ):
-    # Query all users and roles in a more optimized way
+    # Query all users, roles and permissions up front instead of per user
     users = db.query(User).all()
+    roles = {role.id: role for role in db.query(Role).all()}
+    permissions_by_role = queries.get_permissions_by_role(db)
 
     response = []
 
     for user in users:
-        role = db.query(Role).filter(Role.id == user.role_id).first()
-
-        # Fetch permissions in a single query
-        role_permissions = (
-            db.query(Permission)
-            .join(RolePermission)
-            .filter(RolePermission.role_id == role.id)
-            .all()
-        )
-        permissions = [permission.name for permission in role_permissions]
-
-        # Room data removed as Room model is no longer available
-        cv_base64 = None
-        cv_summary = None
-        cv_key_info = None
-        
-        if user.cv:
-            cv_base64 = base64.b64encode(user.cv).decode('utf-8')
-            
-            # Process the CV to get summary and key info
-            processor = CVProcessor()
-            cv_text = processor.extract_text_from_pdf(user.cv)
-            
-            if cv_text:
-                cv_summary = processor.generate_summary(cv_text)
-                cv_key_info = processor.extract_key_info(cv_text)
+        role = roles[user.role_id]
+        permissions = permissions_by_role.get(role.id, [])
 
         # Construct the response for each user
         user_response = {
@@ -94,21 +77,79 @@ async def all_users(
             "job_title": user.job_title,
             "message": user.message,
           
-            "has_cv": user.cv is not None,  # Only indicate if CV exists, don't return binary data
-            "cv_data": cv_base64,  # Include CV as base64 string
-            "cv_summary": cv_summary,  # Include CV summary if available
-            "cv_key_info": cv_key_info,  # Include key info extracted from CV
-            "created_at": user.created_at.strftime(
-                "%Y-%m-%d %H:%M:%S"
-            ) if user.created_at else None  # Convert datetime to string
+            "has_cv": user.cv_hash is not None,
+            # The PDF itself is served by GET /api/user/{id}/cv
+            "cv_url": utils.cvUrl(user),
+            "cv_hash": user.cv_hash,
+            "created_at": user.created_at
         }
 
         # Append the user response to the list
         response.append(user_response)
 
     # Return the final response as JSON
-    return JSONResponse(status_code=200, content={"users": response})
+    return ORJSONResponse(status_code=200, content={"users": response})
+
+
+
+CV_CHUNK_BYTES = 64 * 1024
+PDF_MAGIC = b"%PDF-"
+CONTENT_LENGTH = re.compile(r"[0-9]+")
+BYTE_RANGE = re.compile(r"([0-9]*)-([0-9]*)")
+
+
+def _check_cv_length(length: Optional[int]):
+    """413 for an upload declaring more than cv_max_bytes, before any of it is read"""
+    if length is not None and length > settings.cv_max_bytes:
+        raise HTTPException(status_code=413, detail=f"CV must not exceed {settings.cv_max_bytes} bytes")
+
+
+def _content_length(request: Request) -> Optional[int]:
+    """The declared body size, None when not declared; 400 for a malformed header"""
+    value = request.headers.get("content-length")
+    if value is None:
+        return None
+    if not CONTENT_LENGTH.fullmatch(value.strip()):
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    return int(value)
+
+
+async def _upload_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(CV_CHUNK_BYTES):
+        yield chunk
+
 
+async def _store_cv(chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+    """Stream an uploaded CV into the blob store, returns its (hash, size)
+
+    The size and the PDF magic bytes are checked as the chunks arrive, so an
+    upload is rejected as soon as it goes wrong: 413 past cv_max_bytes, 415
+    when it is not a PDF, 422 when it cannot be parsed or has more than
+    cv_max_pages pages. Nothing is stored for a rejected upload.
+    """
+    with blob_store.BlobWriter() as writer:
+        head = b""
+        async for chunk in chunks:
+            _check_cv_length(writer.size + len(chunk))
+            if len(head) < len(PDF_MAGIC):
+                head += chunk[:len(PDF_MAGIC) - len(head)]
+                if not PDF_MAGIC.startswith(head):
+                    raise HTTPException(status_code=415, detail="CV file must be a PDF")
+            # Disk writes stay off the event loop
+            await asyncio.to_thread(writer.write, chunk)
+        if head != PDF_MAGIC:
+            raise HTTPException(status_code=415, detail="CV file must be a PDF")
+
+        def count_pages():
+            with writer.open_mapped() as pdf_data:
+                return CVProcessor.count_pages(pdf_data)
+
+        pages = await asyncio.to_thread(count_pages)
+        if pages is None:
+            raise HTTPException(status_code=422, detail="CV is not a readable PDF")
+        if pages > settings.cv_max_pages:
+            raise HTTPException(status_code=422, detail=f"CV must not exceed {settings.cv_max_pages} pages")
+        return await asyncio.to_thread(writer.commit)
 
 
 @router.post("/signup")
@@ -126,26 +167,19 @@ async def signup(
     db: Session = Depends(get_db),
 ):
     # Check if email already exists
-    user = db.query(User).filter(User.email == email).first()
+    user = queries.get_user_by_email(db, email)
     if user is not None:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400, content={"message": "Email already exists"}
         )
     
-    # Get the latest user ID
-    latest_user_id = (
-        0
-        if db.query(User).count() == 0
-        else db.query(User).order_by(User.id.desc()).first().id
-    )
-    
     # Determine role_id to use
     user_role_id = None
     if role_id is not None:
         # Use provided role_id if it exists
-        role = db.query(Role).filter(Role.id == role_id).first()
+        role = queries.get_role(db, role_id)
         if not role:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400, content={"message": "Invalid role ID"}
             )
         user_role_id = role.id
@@ -153,26 +187,25 @@ async def signup(
         # Default to JOB_SEEKER role if no role_id provided
         job_seeker_role = db.query(Role).filter(Role.name == "JOB_SEEKER").first()
         if not job_seeker_role:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500, content={"message": "JOB_SEEKER role not found"}
             )
         user_role_id = job_seeker_role.id
     
-    # Process CV file if provided
-    cv_data = None
+    # Process CV file if provided, validated and stored chunk by chunk
+    cv_hash = cv_size = None
     if cv:
-        # Check if file is a PDF
-        if not cv.content_type == "application/pdf":
-            return JSONResponse(
-                status_code=400, content={"message": "CV file must be a PDF"}
+        try:
+            _check_cv_length(cv.size)
+            cv_hash, cv_size = await _store_cv(_upload_chunks(cv))
+        except HTTPException as e:
+            # Signup errors keep their {"message"} shape, a non-PDF is still a 400
+            return ORJSONResponse(
+                status_code=400 if e.status_code == 415 else e.status_code, content={"message": e.detail}
             )
-        
-        # Read the file content
-        cv_data = await cv.read()
     
     # Create new user with JOB_SEEKER role
     newUser = User(
-        id=latest_user_id + 1,
         name=name,
         email=email,
         password=utils.hash(password),
@@ -183,20 +216,23 @@ async def signup(
         job_title=job_title,
         message=message,
         created_at=datetime.utcnow(),
-        cv=cv_data  # Save CV data if provided
+        cv_hash=cv_hash,  # Reference the stored CV if provided
+        cv_size=cv_size,
+        cv_mime="application/pdf" if cv_hash else None
     )
     
     db.add(newUser)
-    db.commit()
     
-    # Send welcome email
-    utils.sendEmail(
+    # Queue welcome email, committed together with the new user
+    utils.queueEmail(
+        db,
         "Welcome to our platform",
         f"Hello {name},\n\nWelcome to our platform. You have successfully registered.\n\nBest Regards,\nTeam",
         email,
     )
+    db.commit()
     
-    return JSONResponse(status_code=201, content={"message": "Signup successful"})
+    return ORJSONResponse(status_code=201, content={"message": "Signup successful"})
 
 
 class CVSummaryRequest(BaseModel):
@@ -209,32 +245,27 @@ async def get_cv_summary(
     db: Session = Depends(get_db),
 ):
     # Check if user exists
-    user = db.query(User).filter(User.id == request.user_id).first()
+    user = queries.get_user(db, request.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if user has a CV
-    if not user.cv:
+    if not user.cv_hash:
         raise HTTPException(status_code=404, detail="CV not found for this user")
     
-    # Process the CV
-    processor = CVProcessor()
-    
-    # Extract text from PDF
-    cv_text = processor.extract_text_from_pdf(user.cv)
-    if not cv_text:
-        return JSONResponse(
+    # Process the CV: extract the text, summarize it and pull out key information
+    analysis = await CVProcessor.analyze(user.cv_hash)
+    if not analysis:
+        return ORJSONResponse(
             status_code=400, 
             content={"message": "Could not extract text from the PDF"}
         )
     
-    # Generate summary
-    summary = processor.generate_summary(cv_text)
-    
-    # Extract key information
-    key_info = processor.extract_key_info(cv_text)
+    cv_text = analysis["text"]
+    summary = analysis["summary"]
+    key_info = analysis["key_info"]
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200,
         content={
             "user_id": request.user_id,
@@ -252,7 +283,7 @@ async def get_my_cv_summary(
 ):
     # Get the user from the database
     if isinstance(current_user, dict):
-        user = db.query(User).filter(User.id == current_user["id"]).first()
+        user = queries.get_user(db, current_user["id"])
     else:
         user = current_user
         
@@ -260,27 +291,22 @@ async def get_my_cv_summary(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check if user has a CV
-    if not user.cv:
+    if not user.cv_hash:
         raise HTTPException(status_code=404, detail="You haven't uploaded a CV yet")
     
-    # Process the CV
-    processor = CVProcessor()
-    
-    # Extract text from PDF
-    cv_text = processor.extract_text_from_pdf(user.cv)
-    if not cv_text:
-        return JSONResponse(
+    # Process the CV: extract the text, summarize it and pull out key information
+    analysis = await CVProcessor.analyze(user.cv_hash)
+    if not analysis:
+        return ORJSONResponse(
             status_code=400, 
             content={"message": "Could not extract text from your PDF"}
         )
     
-    # Generate summary
-    summary = processor.generate_summary(cv_text)
-    
-    # Extract key information
-    key_info = processor.extract_key_info(cv_text)
+    cv_text = analysis["text"]
+    summary = analysis["summary"]
+    key_info = analysis["key_info"]
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=200,
         content={
             "summary": summary,
@@ -289,3 +315,111 @@ async def get_my_cv_summary(
         }
     )
 
+
+def _byte_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte of a single-range Range header; None when it cannot be satisfied
+
+    Raises ValueError for headers that are malformed, invalid (first after
+    last) or ask for several ranges, which are answered with the whole file.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError(range_header)
+    # Positions are plain digits, int() alone would also take signs and spaces
+    match = BYTE_RANGE.fullmatch(spec.strip())
+    if match is None or not any(match.groups()):
+        raise ValueError(range_header)
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        # Invalid rather than unsatisfiable, RFC 9110 has it ignored
+        raise ValueError(range_header)
+    if first >= size:
+        return None
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+@router.put("/cv")
+async def upload_cv(
+    request: Request,
+    current_user: User = Depends(get_user_from_session),
+    db: Session = Depends(get_db),
+):
+    """Replace the current user's CV with the PDF sent as the raw request body"""
+    _check_cv_length(_content_length(request))
+    cv_hash, cv_size = await _store_cv(request.stream())
+
+    user = queries.get_user(db, current_user["id"])
+    user.cv_hash = cv_hash
+    user.cv_size = cv_size
+    user.cv_mime = "application/pdf"
+    db.commit()
+
+    return ORJSONResponse(
+        status_code=200,
+        content={"cv_url": utils.cvUrl(user), "cv_hash": cv_hash, "cv_size": cv_size},
+    )
+
+
+@router.get("/{user_id}/cv")
+async def download_cv(
+    user_id: int,
+    request: Request,
+    current_user: User = Depends(get_user_from_session),
+    db: Session = Depends(get_db),
+):
+    # Users download their own CV, recruiters anyone's
+    if current_user["id"] != user_id and "VIEW_USER" not in current_user["role"]["permissions"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    cv = db.query(User.cv_hash, User.cv_size, User.cv_mime).filter(User.id == user_id).first()
+    if cv is None or cv.cv_hash is None:
+        raise HTTPException(status_code=404, detail="CV not found for this user")
+
+    etag = f'"{cv.cv_hash}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'inline; filename="cv-{user_id}.pdf"',
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    status_code = 200
+    first, last = 0, cv.cv_size - 1
+    range_header = request.headers.get("range")
+    # A Range conditional on an older version gets the whole new file
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = _byte_range(range_header, cv.cv_size)
+        except ValueError:
+            byte_range = (first, last)
+        else:
+            if byte_range is None:
+                return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{cv.cv_size}"})
+            status_code = 206
+            headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{cv.cv_size}"
+        first, last = byte_range
+
+    try:
+        data = blob_store.view(cv.cv_hash)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="CV not found for this user")
+    headers["Content-Length"] = str(last - first + 1)
+
+    def chunks():
+        # Slices of the memory map go to the server as they are, only the pages sent are read
+        for start in range(first, last + 1, CV_CHUNK_BYTES):
+            yield data[start:min(start + CV_CHUNK_BYTES, last + 1)]
+
+    return StreamingResponse(
+        chunks(), status_code=status_code, media_type=cv.cv_mime or "application/pdf", headers=headers
+    )
+
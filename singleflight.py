@@ -0,0 +1,62 @@
+"""Single-flight execution of identical concurrent computations.
+
+Concurrent calls to SingleFlight.do with the same key share one execution:
+the first caller (the leader) runs the computation and every caller arriving
+while it is in flight awaits the leader's outcome instead of starting its
+own. Nothing is cached, a call arriving after the outcome was delivered runs
+again. Results are shared as is, so callers must not mutate them.
+
+If the leader is cancelled, e.g. because its client went away, a waiting
+caller takes over and runs the computation itself.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+import metrics
+
+
+class _LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run compute() unless an identical call is in flight, returns (result, shared)
+
+        shared is True for callers that got the leader's result; side effects
+        that must happen once, like storing the result, are left to the leader.
+        """
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            metrics.increment(f"singleflight.{self.name}.coalesced")
+            try:
+                # A waiter giving up must not cancel the future the others wait on
+                return await asyncio.shield(future), True
+            except _LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        metrics.increment(f"singleflight.{self.name}.executed")
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+            # Mark the exception retrieved, there may have been nobody waiting for it
+            if future.done():
+                future.exception()
@@ -0,0 +1,119 @@
+"""Catalog of pregenerated React UI tasks.
+
+The stock ``ui_type × difficulty × features`` combinations are few, so tasks
+for them are generated ahead of time and kept at a target depth per
+combination. A request pops one task, which is served once, and wakes the
+refill worker to replace it. Custom descriptions and combinations outside
+the catalog are still generated on demand.
+"""
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, List, Optional
+
+import llm
+import metrics
+from config import settings
+from database import SessionLocal
+from models import UITaskCatalogEntry
+from openai_utils import SkillAssessment
+
+logger = logging.getLogger(__name__)
+
+UI_TYPES = ("landing-page", "dashboard", "form", "e-commerce", "social-media", "admin-panel")
+DIFFICULTIES = ("easy", "medium", "hard")
+# Feature sets worth stocking; ReactUIRequest defaults to responsive and dark-mode
+FEATURE_SETS = ((), ("responsive",), ("dark-mode", "responsive"))
+
+_pending_refills = set()
+_refill_requested = asyncio.Event()
+
+
+def catalog_key(ui_type: str, difficulty: str, features: List[str]) -> str:
+    features = sorted({feature.strip().lower() for feature in features or [] if feature.strip()})
+    return f"{ui_type.strip().lower()}|{difficulty.strip().lower()}|{','.join(features)}"
+
+
+CATALOG = {
+    catalog_key(ui_type, difficulty, features): (ui_type, difficulty, list(features))
+    for ui_type, difficulty, features in itertools.product(UI_TYPES, DIFFICULTIES, FEATURE_SETS)
+}
+
+
+def _entries(db, key: str):
+    return db.query(UITaskCatalogEntry).filter(UITaskCatalogEntry.catalog_key == key)
+
+
+def pop(db, key: str) -> Optional[Dict[str, Any]]:
+    """Remove and return the oldest task for the key; rows other requests hold are skipped"""
+    entry = _entries(db, key).order_by(UITaskCatalogEntry.id).limit(1).with_for_update(skip_locked=True).first()
+    if entry is None:
+        return None
+    task = entry.task
+    db.delete(entry)
+    db.commit()
+    return task
+
+
+def request_refill(key: str):
+    _pending_refills.add(key)
+    _refill_requested.set()
+
+
+def take(db, ui_type: str, difficulty: str, features: List[str]) -> Optional[Dict[str, Any]]:
+    """A pregenerated task for a stock combination, or None to generate on demand"""
+    key = catalog_key(ui_type, difficulty, features)
+    if key not in CATALOG:
+        metrics.increment("ui_task_catalog.uncatalogued")
+        return None
+
+    task = pop(db, key)
+    request_refill(key)
+    metrics.increment("ui_task_catalog.hit" if task is not None else "ui_task_catalog.miss")
+    return task
+
+
+async def refill(key: str):
+    """Top the key up to the target depth"""
+    ui_type, difficulty, features = CATALOG[key]
+    db = SessionLocal()
+    try:
+        while _entries(db, key).count() < settings.ui_task_catalog_depth:
+            task = await SkillAssessment.generate_react_ui_task(
+                ui_type=ui_type, difficulty=difficulty, features=features, use_fallback=False
+            )
+            if task is None:
+                break
+            db.add(UITaskCatalogEntry(catalog_key=key, task=task))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def run_catalog_refiller():
+    """Refill popped keys as soon as asked, and sweep the whole catalog periodically"""
+    next_sweep = 0.0
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await asyncio.wait_for(_refill_requested.wait(), max(next_sweep - loop.time(), 0))
+        except asyncio.TimeoutError:
+            pass
+        _refill_requested.clear()
+
+        if loop.time() >= next_sweep:
+            keys = list(CATALOG)
+            next_sweep = loop.time() + settings.ui_task_catalog_refill_interval_seconds
+        else:
+            keys = list(_pending_refills)
+        _pending_refills.clear()
+
+        for index, key in enumerate(keys):
+            # Generation fails fast while OpenAI is down, keep the rest for the next round
+            if llm.breaker.state == "open":
+                _pending_refills.update(keys[index:])
+                break
+            try:
+                await refill(key)
+            except Exception as e:
+                logger.exception("UI task catalog refill of %s failed: %s", key, e)
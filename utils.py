@@ -2,18 +2,13 @@ import logging
 import random
 from datetime import datetime
 from passlib.context import CryptContext
-from email.message import EmailMessage
-import ssl
-import smtplib
 from config import settings
+from models import EmailOutbox
 
 pwdContext = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 logging.basicConfig(level=logging.INFO)
 
-emailSender = settings.email_sender
-emailPassword = settings.email_password
-
 def hash(password: str):
     return pwdContext.hash(password)
 
@@ -29,13 +24,10 @@ def createUserName(name: str):
         userName = name[0] + name[1] + str(random.randint(0, 9999))
     return userName
 
-def sendEmail(subject: str, body: str, receiver_email: str):
-    message = EmailMessage()
-    message.set_content(body)
-    message["Subject"] = subject
-    message["From"] = emailSender
-    message["To"] = receiver_email
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-        server.login(emailSender, emailPassword)
-        server.send_message(message)
+def queueEmail(db, subject: str, body: str, receiver_email: str):
+    # Delivered by email_worker; the row is committed with the caller's transaction
+    db.add(EmailOutbox(receiver=receiver_email, subject=subject, body=body))
+
+def cvUrl(user):
+    # Listings link to the CV instead of embedding it
+    return f"/api/user/{user.id}/cv" if user.cv_hash else None